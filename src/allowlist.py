@@ -0,0 +1,162 @@
+import argparse
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from model_loader import REPO_ROOT
+
+
+DEFAULT_ALLOWLIST_PATH = os.environ.get(
+    "THREAT_ALLOWLIST_PATH",
+    os.path.join(REPO_ROOT, "models", "allowlist.npy")
+)
+
+
+# ================================
+# Hashing
+# ================================
+
+# Each entry is stored as one uint64 key: a 63-bit blake2b hash of the
+# domain shifted left, with the low bit set when the entry also covers
+# subdomains. All keys live in one sorted array, so the index is 8 bytes
+# per domain, loads with np.load(mmap_mode="r") and is shared between
+# processes.
+
+SUFFIX_FLAG = np.uint64(1)
+
+
+def _hash63(name):
+    digest = hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") >> 1
+
+
+def _keys(names, suffix):
+    flag = 1 if suffix else 0
+    return np.fromiter(((_hash63(n) << 1) | flag for n in names), dtype=np.uint64)
+
+
+def _clean(domains):
+    s = pd.Series(domains, dtype=str).str.strip().str.lower()
+    s = s.str.replace(r"^www\.", "", regex=True)
+    return s[s.str.len() > 0].drop_duplicates().tolist()
+
+
+# ================================
+# Allowlist Index
+# ================================
+
+class AllowlistIndex:
+    """Exact and subdomain allowlist lookups over a sorted hash array.
+
+    An exact entry only matches that domain. A suffix entry also matches
+    any subdomain of it, so "google.com" covers "mail.google.com".
+    """
+
+    def __init__(self, keys):
+        self.keys = keys
+
+    @classmethod
+    def build(cls, exact=(), suffix=()):
+        keys = np.concatenate([_keys(_clean(exact), False), _keys(_clean(suffix), True)])
+        return cls(np.unique(keys))
+
+    @classmethod
+    def load(cls, path=None, mmap_mode="r"):
+        return cls(np.load(path or DEFAULT_ALLOWLIST_PATH, mmap_mode=mmap_mode))
+
+    def save(self, path=None):
+        np.save(path or DEFAULT_ALLOWLIST_PATH, self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _present(self, keys):
+        if not len(self.keys):
+            return np.zeros(len(keys), dtype=bool)
+        idx = np.searchsorted(self.keys, keys)
+        idx[idx == len(self.keys)] = 0
+        return self.keys[idx] == keys
+
+    def contains(self, domain):
+        labels = domain.split(".")
+
+        # The domain itself (exact or suffix entry), then every parent with
+        # at least two labels (suffix entries only). Single labels such as
+        # "com" are never matched.
+        h = _hash63(domain) << 1
+        candidates = [h, h | 1]
+        for i in range(1, len(labels) - 1):
+            candidates.append((_hash63(".".join(labels[i:])) << 1) | 1)
+
+        return bool(self._present(np.array(candidates, dtype=np.uint64)).any())
+
+    def __contains__(self, domain):
+        return self.contains(domain)
+
+
+def load_allowlist(seed_suffixes=(), path=None):
+    """The prebuilt index if it exists, else one built from seed_suffixes."""
+
+    path = path or DEFAULT_ALLOWLIST_PATH
+    if os.path.exists(path):
+        return AllowlistIndex.load(path)
+    return AllowlistIndex.build(suffix=seed_suffixes)
+
+
+# ================================
+# Build CLI
+# ================================
+
+def _read_umbrella(path, top):
+    return pd.read_csv(path, header=None, usecols=[1], nrows=top)[1]
+
+
+def _read_majestic(path, top):
+    return pd.read_csv(path, usecols=["Domain"], nrows=top)["Domain"]
+
+
+def _read_lines(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def main(argv=None):
+    from threat_engine import TRUSTED_DOMAINS
+
+    parser = argparse.ArgumentParser(description="Build the allowlist index.")
+    parser.add_argument("--umbrella", help="Cisco Umbrella top-1m.csv")
+    parser.add_argument("--majestic", help="majestic_million.csv")
+    parser.add_argument("--domains", action="append", default=[],
+                        help="Text file with one domain per line (repeatable)")
+    parser.add_argument("--top", type=int, default=None,
+                        help="Only take the first N rows of each ranked list")
+    parser.add_argument("--subdomains", action="store_true",
+                        help="Let list entries also match their subdomains. Off by default: "
+                             "ranked lists include shared hosting suffixes whose subdomains "
+                             "are attacker-controlled")
+    parser.add_argument("-o", "--output", default=DEFAULT_ALLOWLIST_PATH)
+    args = parser.parse_args(argv)
+
+    listed = []
+    if args.umbrella:
+        listed.append(_read_umbrella(args.umbrella, args.top))
+    if args.majestic:
+        listed.append(_read_majestic(args.majestic, args.top))
+    for path in args.domains:
+        listed.append(pd.Series(_read_lines(path)))
+
+    listed = pd.concat(listed) if listed else pd.Series([], dtype=str)
+
+    if args.subdomains:
+        index = AllowlistIndex.build(suffix=list(listed) + TRUSTED_DOMAINS)
+    else:
+        index = AllowlistIndex.build(exact=listed, suffix=TRUSTED_DOMAINS)
+
+    index.save(args.output)
+    print(f"Allowlist built: {len(index):,} entries, {index.keys.nbytes:,} bytes -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
 import streamlit as st
 import base64
+import html
+import io
 import os
+import threat_engine
 from threat_engine import analyze_url, extract_features
+from history_store import HistoryStore, RISK_LEVELS
 import time
 import pandas as pd
 from PIL import Image
@@ -26,11 +30,26 @@ def get_base64_image(image_path):
             return base64.b64encode(img_file.read()).decode()
     return ""
 
+# ===============================
+# SHARED RESOURCES (loaded once per process, not per session)
+# ===============================
+@st.cache_resource
+def load_engine():
+    """Loads the model eagerly; every session then reuses it."""
+    return threat_engine.warm_up()
+
+
+@st.cache_resource
+def get_history_store():
+    return HistoryStore()
+
+
+load_engine()
+history = get_history_store()
+
 # ===============================
 # SESSION STATE INITIALIZATION
 # ===============================
-if "history" not in st.session_state:
-    st.session_state.history = []
 if "dark_mode" not in st.session_state:
     st.session_state.dark_mode = True
 
@@ -539,13 +558,12 @@ st.markdown(f"""
 with st.sidebar:
     st.markdown("# Analytics Dashboard")
 
-    total_scans = len(st.session_state.history)
-    high_risk_count = sum(
-        1 for item in st.session_state.history if item["Risk"] == "HIGH")
-    medium_risk_count = sum(
-        1 for item in st.session_state.history if item["Risk"] == "MEDIUM")
-    low_risk_count = sum(
-        1 for item in st.session_state.history if item["Risk"] == "LOW")
+    # Counts come from the aggregates table, not a pass over the history
+    counts = history.counts()
+    total_scans = counts["TOTAL"]
+    high_risk_count = counts["HIGH"]
+    medium_risk_count = counts["MEDIUM"]
+    low_risk_count = counts["LOW"]
 
     st.markdown(f"""
     <div class="sidebar-stat">
@@ -576,16 +594,6 @@ with st.sidebar:
     """, unsafe_allow_html=True)
 
 
-# ===============================
-# GLASS INPUT CONTAINER
-# ===============================
-
-url = st.text_input(
-    "Enter URL to Analyze:",
-    placeholder="https://example.com",
-    key="url_input",
-)
-
 # ===============================
 # ANIMATED THREAT METER FUNCTION
 # ===============================
@@ -673,156 +681,262 @@ def threat_breakdown(features_dict):
     st.markdown('</div>', unsafe_allow_html=True)
 
 
+# ===============================
+# SCAN MODES
+# ===============================
+single_tab, upload_tab = st.tabs(["🔎 Single URL", "📂 Batch Upload"])
+
 # ===============================
 # SCAN BUTTON & ANALYSIS
 # ===============================
-if st.button("SCAN URL"):
+with single_tab:
+
+    # GLASS INPUT CONTAINER
+    url = st.text_input(
+        "Enter URL to Analyze:",
+        placeholder="https://example.com",
+        key="url_input",
+    )
+
+    if st.button("SCAN URL"):
+
+        if url:
+
+            st.markdown('</div>', unsafe_allow_html=True)
+
+            # Get analysis result
+            with st.spinner("Analyzing URL..."):
+                result = analyze_url(url)
+
+            # Calculate confidence
+            confidence = abs(result["probability"] - 0.5) * 200
+            confidence = round(confidence, 2)
+
+            # Add to history
+            history.add(result, url)
+
+            st.markdown('</div>', unsafe_allow_html=True)  # Close input container
+
+            # ===============================
+            # ANALYSIS REPORT CARD
+            # ===============================
+
+            # Status Badge
+            if result["prediction"] == 1:
+                st.markdown(
+                    '<div class="status-badge badge-malicious">🚨 MALICIOUS DETECTED</div>', unsafe_allow_html=True)
+            else:
+                st.markdown(
+                    '<div class="status-badge badge-safe">✅ URL IS SAFE</div>', unsafe_allow_html=True)
+
+            # Metrics Row
+            col1, col2, col3 = st.columns(3)
+
+            with col1:
+                st.markdown(f"""
+                <div class="metric-card">
+                    <div class="metric-label">Domain</div>
+                    <div class="metric-value" style="font-size: 24px;">{html.escape(result["domain"][:30])}</div>
+                </div>
+                """, unsafe_allow_html=True)
+
+            with col2:
+                risk_color = "#10b981" if result["risk_level"] == "LOW" else \
+                    "#f59e0b" if result["risk_level"] == "MEDIUM" else "#ef4444"
+                st.markdown(f"""
+                <div class="metric-card">
+                    <div class="metric-label">Risk Level</div>
+                    <div class="metric-value" style="color: {risk_color};">{result["risk_level"]}</div>
+                </div>
+                """, unsafe_allow_html=True)
+
+            with col3:
+                st.markdown(f"""
+                <div class="metric-card">
+                    <div class="metric-label">Threat Score</div>
+                    <div class="metric-value">{result["threat_score"]}/100</div>
+                </div>
+                """, unsafe_allow_html=True)
+
+            # Threat Meter
+            st.markdown(
+                '<div class="section-title">🎯 Threat Assessment</div>', unsafe_allow_html=True)
+            animated_threat_meter(result["threat_score"], result["risk_level"])
+
+            # Custom Confidence Bar
+            st.markdown(
+                '<div class="section-title">🧠 Model Confidence</div>', unsafe_allow_html=True)
+            custom_confidence_bar(confidence)
 
-    if url:
+            # Threat Breakdown
+            features = extract_features(result["domain"])
+            threat_breakdown(features)
 
-        terminal_placeholder = st.empty()
+            # Risk Indicators
+            st.markdown(
+                '<div class="section-title">⚠️ Risk Indicators</div>', unsafe_allow_html=True)
+            for reason in result["reasons"]:
+                st.markdown(
+                    f'<div class="risk-indicator">• {reason}</div>', unsafe_allow_html=True)
+
+            # Technical Analysis Expander
+            with st.expander("🔬 Technical Analysis - For Experts Only"):
+                st.markdown("### Feature Extraction Results")
+                df = pd.DataFrame(features.items(), columns=["Feature", "Value"])
+                st.dataframe(df, width="stretch")
+
+                st.markdown("### Feature Distribution")
+                st.bar_chart(df.set_index("Feature"))
 
-        terminal_steps = [
-            ">>> Initializing threat analysis engine...",
-            ">>> Extracting URL features...",
-            ">>> Running ML model prediction...",
-            ">>> Analyzing domain reputation...",
-            ">>> Generating threat report...",
-            ">>> Analysis complete ✓"
-        ]
+            st.markdown('</div>', unsafe_allow_html=True)  # Close report card
 
-        for step in terminal_steps:
-            terminal_placeholder.markdown(
-                f'<div class="terminal-line">{step}<span class="terminal-cursor">_</span></div>', unsafe_allow_html=True)
-            time.sleep(0.3)
+        else:
+            st.markdown('</div>', unsafe_allow_html=True)  # Close input container
+            st.warning("⚠️ Please enter a URL to analyze")
 
+    else:
+        # Close input container if no scan
         st.markdown('</div>', unsafe_allow_html=True)
 
-        # Progress bar
-        progress = st.progress(0)
-        for i in range(100):
-            time.sleep(0.01)
-            progress.progress(i + 1)
+# ===============================
+# BATCH UPLOAD SCANNING
+# ===============================
+UPLOAD_CHUNK_SIZE = 2000
+RESULT_COLUMNS = ["domain", "probability", "prediction", "threat_score", "risk_level", "reasons"]
+
 
-        # Get analysis result
-        result = analyze_url(url)
-        progress.empty()
+def read_upload(uploaded):
+    if uploaded.name.lower().endswith(".parquet"):
+        return pd.read_parquet(uploaded)
+    return pd.read_csv(uploaded)
 
-        # Calculate confidence
-        confidence = abs(result["probability"] - 0.5) * 200
-        confidence = round(confidence, 2)
 
-        # Add to history
-        st.session_state.history.append({
-            "URL": result["domain"],
-            "Risk": result["risk_level"],
-            "Score": result["threat_score"]
-        })
+def scan_frame(df, column, progress):
+    """Scores df[column] chunk by chunk with analyze_urls, updating progress.
 
-        st.markdown('</div>', unsafe_allow_html=True)  # Close input container
+    Returns the scored frame, the names its result columns were given and
+    the result dicts (for the history store).
+    """
 
-        # ===============================
-        # ANALYSIS REPORT CARD
-        # ===============================
+    urls = df[column].fillna("").astype(str).tolist()
+    results = []
+    start = time.perf_counter()
 
-        # Status Badge
-        if result["prediction"] == 1:
-            st.markdown(
-                '<div class="status-badge badge-malicious">🚨 MALICIOUS DETECTED</div>', unsafe_allow_html=True)
-        else:
-            st.markdown(
-                '<div class="status-badge badge-safe">✅ URL IS SAFE</div>', unsafe_allow_html=True)
+    for i in range(0, len(urls), UPLOAD_CHUNK_SIZE):
+        results.extend(threat_engine.analyze_urls(urls[i:i + UPLOAD_CHUNK_SIZE]))
+        rate = len(results) / max(time.perf_counter() - start, 1e-9)
+        progress.progress(
+            len(results) / len(urls),
+            text=f"Scored {len(results):,} / {len(urls):,} URLs · {rate:,.0f} URLs/s"
+        )
 
-        # Metrics Row
-        col1, col2, col3 = st.columns(3)
+    # Input columns are kept as they are; clashing result columns get a prefix
+    scored = df.copy()
+    names = {}
+    for col in RESULT_COLUMNS:
+        names[col] = f"scan_{col}" if col in df.columns else col
+        values = [r[col] for r in results]
+        scored[names[col]] = ["; ".join(v) for v in values] if col == "reasons" else values
+    return scored, names, [dict(r, url=u) for u, r in zip(urls, results)]
 
-        with col1:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-label">Domain</div>
-                <div class="metric-value" style="font-size: 24px;">{result["domain"][:30]}</div>
-            </div>
-            """, unsafe_allow_html=True)
-
-        with col2:
-            risk_color = "#10b981" if result["risk_level"] == "LOW" else \
-                "#f59e0b" if result["risk_level"] == "MEDIUM" else "#ef4444"
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-label">Risk Level</div>
-                <div class="metric-value" style="color: {risk_color};">{result["risk_level"]}</div>
-            </div>
-            """, unsafe_allow_html=True)
 
-        with col3:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-label">Threat Score</div>
-                <div class="metric-value">{result["threat_score"]}/100</div>
-            </div>
-            """, unsafe_allow_html=True)
-
-        # Threat Meter
-        st.markdown(
-            '<div class="section-title">🎯 Threat Assessment</div>', unsafe_allow_html=True)
-        animated_threat_meter(result["threat_score"], result["risk_level"])
-
-        # Custom Confidence Bar
-        st.markdown(
-            '<div class="section-title">🧠 Model Confidence</div>', unsafe_allow_html=True)
-        custom_confidence_bar(confidence)
-
-        # Threat Breakdown
-        features = extract_features(result["domain"])
-        threat_breakdown(features)
-
-        # Risk Indicators
-        st.markdown(
-            '<div class="section-title">⚠️ Risk Indicators</div>', unsafe_allow_html=True)
-        for reason in result["reasons"]:
-            st.markdown(
-                f'<div class="risk-indicator">• {reason}</div>', unsafe_allow_html=True)
+def scored_file(scored, name):
+    """(bytes, file name, mime type) in the uploaded file's format."""
 
-        # Technical Analysis Expander
-        with st.expander("🔬 Technical Analysis - For Experts Only"):
-            st.markdown("### Feature Extraction Results")
-            df = pd.DataFrame(features.items(), columns=["Feature", "Value"])
-            st.dataframe(df, width="stretch")
+    stem = os.path.splitext(name)[0]
+    if name.lower().endswith(".parquet"):
+        buffer = io.BytesIO()
+        scored.to_parquet(buffer, index=False)
+        return buffer.getvalue(), f"{stem}_scored.parquet", "application/octet-stream"
+    return scored.to_csv(index=False).encode(), f"{stem}_scored.csv", "text/csv"
 
-            st.markdown("### Feature Distribution")
-            st.bar_chart(df.set_index("Feature"))
 
-        st.markdown('</div>', unsafe_allow_html=True)  # Close report card
+with upload_tab:
+    uploaded = st.file_uploader("Upload a CSV or Parquet file of URLs", type=["csv", "parquet"])
 
-    else:
-        st.markdown('</div>', unsafe_allow_html=True)  # Close input container
-        st.warning("⚠️ Please enter a URL to analyze")
+    if uploaded is not None:
+        upload_df = read_upload(uploaded)
+        columns = list(upload_df.columns)
+        default = next((columns.index(c) for c in ("url", "domain") if c in columns), 0)
 
-else:
-    # Close input container if no scan
-    st.markdown('</div>', unsafe_allow_html=True)
+        column = st.selectbox("URL column", columns, index=default)
+        save_to_history = st.checkbox("Add results to scan history", value=False)
+        st.caption(f"{len(upload_df):,} rows")
+
+        if st.button("SCAN FILE"):
+            progress = st.progress(0.0, text="Starting...")
+            scored, names, results = scan_frame(upload_df, column, progress)
+            progress.empty()
+
+            if save_to_history:
+                history.add_many(results)
+
+            st.session_state.upload_result = (uploaded.name, scored, names)
+
+    if "upload_result" in st.session_state:
+        name, scored, names = st.session_state.upload_result
+
+        # Aggregate risk breakdown
+        counts = scored[names["risk_level"]].value_counts()
+        metric_cols = st.columns(len(RISK_LEVELS) + 1)
+        metric_cols[0].metric("Scanned", f"{len(scored):,}")
+        for col, risk in zip(metric_cols[1:], RISK_LEVELS):
+            n = int(counts.get(risk, 0))
+            col.metric(risk, f"{n:,}", f"{n / max(len(scored), 1):.1%}", delta_color="off")
+
+        st.bar_chart(counts.reindex(RISK_LEVELS, fill_value=0))
+
+        st.markdown("### Highest-risk URLs")
+        st.dataframe(
+            scored.sort_values(names["threat_score"], ascending=False).head(50),
+            width="stretch"
+        )
+
+        data, file_name, mime = scored_file(scored, name)
+        st.download_button("Download scored file", data, file_name=file_name, mime=mime)
 
 # ===============================
 # SCAN HISTORY SECTION
 # ===============================
-if st.session_state.history:
+HISTORY_PAGE_SIZE = 25
+
+if history.count() > 0:
 
     st.markdown('<div class="section-title" style="text-align: center; margin-top: 60px;">📜 Scan History</div>',
                 unsafe_allow_html=True)
 
-    history_df = pd.DataFrame(st.session_state.history)
+    filter_col, domain_col, page_col = st.columns([1, 2, 1])
+    with filter_col:
+        risk_filter = st.selectbox("Risk", ["ALL"] + RISK_LEVELS, key="history_risk")
+    with domain_col:
+        domain_filter = st.text_input("Domain", key="history_domain",
+                                      placeholder="exact domain, e.g. example.com")
+
+    risk = None if risk_filter == "ALL" else risk_filter
+    domain = domain_filter.strip().lower() or None
+    total = history.count(risk=risk, domain=domain)
+    pages = max(1, -(-total // HISTORY_PAGE_SIZE))
 
-    # Display history items
-    for index, row in history_df.iterrows():
-        risk_class = row["Risk"].lower()
-        arrow = "🔴" if row["Risk"] == "HIGH" else "🟡" if row["Risk"] == "MEDIUM" else "🟢"
+    with page_col:
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1,
+                               key="history_page_input") - 1
+
+    st.caption(f"{total:,} scans · page {page + 1} of {pages:,}")
+
+    # Display only the current page
+    for row in history.page(page, HISTORY_PAGE_SIZE, risk=risk, domain=domain):
+        # Stored rows are rendered as HTML: escape everything taken from them
+        risk_text = html.escape(row["risk"])
+        risk_class = risk_text.lower()
+        arrow = "🔴" if row["risk"] == "HIGH" else "🟡" if row["risk"] == "MEDIUM" else "🟢"
+        scanned = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["ts"]))
 
         st.markdown(f"""
         <div class="history-item {risk_class}">
             <div>
-                <strong>{arrow} {row['URL'][:60]}</strong>
+                <strong>{arrow} {html.escape(row['domain'][:60])}</strong>
                 <br>
-                <small style="color: #64748b;">Risk: {row['Risk']} | Score: {row['Score']}/100</small>
+                <small style="color: #64748b;">Risk: {risk_text} | Score: {row['score']}/100 | {scanned}</small>
             </div>
         </div>
-        """, unsafe_allow_html=True)
\ No newline at end of file
+        """, unsafe_allow_html=True)
@@ -0,0 +1,235 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import threat_engine
+from model_loader import REPO_ROOT
+from verdict_cache import VerdictCache
+
+
+# ================================
+# Corpus
+# ================================
+
+def load_corpus(size, seed=42):
+    """A reproducible sample of the domains in data/*.csv."""
+
+    frames = [
+        pd.read_csv(path, usecols=["domain"])
+        for path in sorted(glob.glob(os.path.join(REPO_ROOT, "data", "*.csv")))
+    ]
+    domains = pd.concat(frames)["domain"].dropna().astype(str).drop_duplicates()
+    return domains.sample(n=min(size, len(domains)), random_state=seed).tolist()
+
+
+# ================================
+# Timing Helpers
+# ================================
+
+def _summary(samples):
+    """Latency summary in microseconds."""
+
+    us = np.asarray(samples) * 1e6
+    return {
+        "count": int(len(us)),
+        "mean_us": float(us.mean()),
+        "p50_us": float(np.percentile(us, 50)),
+        "p90_us": float(np.percentile(us, 90)),
+        "p99_us": float(np.percentile(us, 99)),
+    }
+
+
+def bench_stages(urls):
+    """Per-URL timings for each stage of analyze_url."""
+
+    timer = time.perf_counter
+    model = threat_engine.loader.model
+    columns = threat_engine.loader.feature_columns or threat_engine.FEATURE_COLUMNS
+    sklearn_model = not isinstance(model, threat_engine.ForestEngine)
+
+    stages = {"normalize_url": [], "extract_features": [], "frame": [], "predict_proba": [], "heuristics": []}
+
+    for url in urls:
+        t0 = timer()
+        full_url, domain = threat_engine.normalize_url(url)
+        t1 = timer()
+        stages["normalize_url"].append(t1 - t0)
+
+        if not domain:
+            continue
+
+        feat = threat_engine.extract_features(domain)
+        t2 = timer()
+        stages["extract_features"].append(t2 - t1)
+
+        X = np.array([[feat[c] for c in columns]], dtype=np.float64)
+        if sklearn_model:
+            X = pd.DataFrame(X, columns=columns)
+        t3 = timer()
+        stages["frame"].append(t3 - t2)
+
+        prob = model.predict_proba(X)[0][1]
+        t4 = timer()
+        stages["predict_proba"].append(t4 - t3)
+
+        threat_engine._score_result(full_url, domain, feat, prob)
+        stages["heuristics"].append(timer() - t4)
+
+    return {name: _summary(samples) for name, samples in stages.items() if samples}
+
+
+def bench_latency(urls):
+    samples = []
+    for url in urls:
+        start = time.perf_counter()
+        threat_engine.analyze_url(url)
+        samples.append(time.perf_counter() - start)
+    return _summary(samples)
+
+
+def bench_throughput(urls, batch_sizes, min_seconds=1.0):
+    """URLs/sec of analyze_urls at each batch size."""
+
+    results = {}
+    for size in batch_sizes:
+        batches = [urls[i:i + size] for i in range(0, len(urls), size) if len(urls[i:i + size]) == size]
+        if not batches:
+            continue
+
+        scored = 0
+        start = time.perf_counter()
+        while True:
+            for batch in batches:
+                threat_engine.analyze_urls(batch)
+                scored += size
+                if time.perf_counter() - start >= min_seconds:
+                    break
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_seconds:
+                break
+
+        results[str(size)] = {"urls_per_sec": scored / elapsed, "batches": scored // size}
+
+    return results
+
+
+# ================================
+# Run / Compare
+# ================================
+
+def run(corpus_size=2000, latency_samples=500, batch_sizes=(1, 10, 100, 1000), seed=42):
+    # Measure the model, not the verdict cache
+    threat_engine.verdict_cache = VerdictCache(maxsize=0)
+
+    load_stats = dict(threat_engine.warm_up(batch_model=True))
+    urls = load_corpus(corpus_size, seed)
+    sample = urls[:latency_samples]
+
+    # One untimed pass so lazy imports and first-call overheads don't count
+    threat_engine.analyze_urls(sample[:10])
+
+    import sklearn
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "cpu_count": os.cpu_count(),
+            "corpus_size": len(urls),
+            "seed": seed,
+            "model": load_stats,
+            "batch_model": threat_engine.batch_loader.path,
+            "batch_model_rows": threat_engine.BATCH_MODEL_ROWS,
+        },
+        "stages": bench_stages(sample),
+        "latency": bench_latency(sample),
+        "throughput": bench_throughput(urls, batch_sizes),
+    }
+
+
+def compare(old, new, tolerance=0.10):
+    """Lists metrics that got worse by more than `tolerance` (a fraction)."""
+
+    regressions = []
+
+    def check(name, before, after, higher_is_better):
+        change = (after - before) / before if before else 0.0
+        worse = -change if higher_is_better else change
+        status = "REGRESSION" if worse > tolerance else "ok"
+        if status != "ok":
+            regressions.append(name)
+        print(f"{status:>10}  {name:<40} {before:>14.1f} -> {after:>14.1f}  ({change:+.1%})")
+
+    for section in ("stages",):
+        for stage, stats in old.get(section, {}).items():
+            if stage in new.get(section, {}):
+                check(f"{section}.{stage}.p50_us", stats["p50_us"], new[section][stage]["p50_us"], False)
+
+    for key in ("p50_us", "p99_us"):
+        if "latency" in old and "latency" in new:
+            check(f"latency.{key}", old["latency"][key], new["latency"][key], False)
+
+    for size, stats in old.get("throughput", {}).items():
+        if size in new.get("throughput", {}):
+            check(f"throughput.{size}.urls_per_sec", stats["urls_per_sec"],
+                  new["throughput"][size]["urls_per_sec"], True)
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scoring hot path benchmarks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Run the benchmarks and write JSON results")
+    p_run.add_argument("-o", "--output", default="-")
+    p_run.add_argument("--corpus-size", type=int, default=2000)
+    p_run.add_argument("--latency-samples", type=int, default=500)
+    p_run.add_argument("--batch-sizes", default="1,10,100,1000")
+    p_run.add_argument("--seed", type=int, default=42)
+
+    p_cmp = sub.add_parser("compare", help="Flag regressions between two result files")
+    p_cmp.add_argument("old")
+    p_cmp.add_argument("new")
+    p_cmp.add_argument("--tolerance", type=float, default=0.10,
+                       help="Allowed relative slowdown before flagging (default 0.10)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run(
+            corpus_size=args.corpus_size,
+            latency_samples=args.latency_samples,
+            batch_sizes=[int(s) for s in args.batch_sizes.split(",")],
+            seed=args.seed,
+        )
+        text = json.dumps(results, indent=2)
+        if args.output == "-":
+            print(text)
+        else:
+            with open(args.output, "w") as f:
+                f.write(text + "\n")
+        return 0
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    regressions = compare(old, new, args.tolerance)
+    print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
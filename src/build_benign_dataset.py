@@ -1,50 +1,83 @@
+import argparse
+
 import pandas as pd
 
-# Load datasets
-umbrella = pd.read_csv("data/top-1m.csv", header=None)
-majestic = pd.read_csv("data/majestic_million.csv")
+from dataset_stream import CsvAppender, SeenHashes, hash_strings
+
+
+# Domains are read in chunks and deduplicated by 64-bit hash, and reading
+# stops as soon as enough rows are kept, so memory does not depend on the
+# size of the ranked lists.
+
+def iter_sources(umbrella_path, majestic_path, chunk_size):
+    # Umbrella first, then Majestic, each in rank order
+    for chunk in pd.read_csv(umbrella_path, header=None, usecols=[1], chunksize=chunk_size, dtype=str):
+        yield chunk[1]
+    for chunk in pd.read_csv(majestic_path, usecols=["Domain"], chunksize=chunk_size, dtype=str):
+        yield chunk["Domain"]
+
+
+def clean(domains):
+    domains = domains.dropna().str.lower()
+    domains = domains.str.replace("www.", "", regex=False)
+    domains = domains.str.strip()
+
+    # Remove very long domains
+    return domains[domains.str.len() < 60]
+
+
+def build(umbrella_path, majestic_path, output_path, limit=5000, chunk_size=100_000):
+    seen = SeenHashes()
+    stats = {"length": 0, "dots": 0, "digits": 0}
+    sample = []
+
+    with CsvAppender(output_path) as out:
+        for domains in iter_sources(umbrella_path, majestic_path, chunk_size):
+            domains = clean(domains)
+
+            # Remove duplicates
+            domains = domains[seen.add(hash_strings(domains))]
+
+            # Take only the top `limit`
+            domains = domains.head(limit - out.rows)
+
+            benign_df = pd.DataFrame({"domain": domains.to_numpy(), "label": 0})
+            out.write(benign_df)
 
-# Extract domain column
-umbrella_domains = umbrella[1]
-majestic_domains = majestic["Domain"]
+            stats["length"] += int(domains.str.len().sum())
+            stats["dots"] += int(domains.str.count(r"\.").sum())
+            stats["digits"] += int(domains.str.count(r"\d").sum())
+            if len(sample) < 5:
+                sample.extend(benign_df.head(5 - len(sample)).itertuples(index=False))
 
-# Combine
-combined = pd.concat([umbrella_domains, majestic_domains])
+            if out.rows >= limit:
+                break
 
-# Clean
-combined = combined.str.lower()
-combined = combined.str.replace("www.", "", regex=False)
-combined = combined.str.strip()
+    rows = out.rows
 
-# Remove duplicates
-combined = combined.drop_duplicates()
+    # 🔥 NOW DO BIAS CHECK (after dataframe creation)
 
-# Remove very long domains
-combined = combined[combined.str.len() < 60]
+    print("Average length:", stats["length"] / rows if rows else float("nan"))
+    print("Dot count avg:", stats["dots"] / rows if rows else float("nan"))
+    print("Digit ratio avg:", stats["digits"] / stats["length"] if stats["length"] else float("nan"))
 
-# Take only top 5000
-benign_domains = combined.head(5000)
+    print("\nSample domains:")
+    print(pd.DataFrame(sample, columns=["domain", "label"]))
 
-# Create dataframe
-benign_df = pd.DataFrame({
-    "domain": benign_domains,
-    "label": 0
-})
+    print("Benign dataset created:", (rows, 2))
 
-# 🔥 NOW DO BIAS CHECK (after dataframe creation)
 
-print("Average length:", benign_df["domain"].str.len().mean())
-print("Dot count avg:", benign_df["domain"].str.count(r"\.").mean())
-print(
-    "Digit ratio avg:",
-    benign_df["domain"].str.count(r"\d").sum()
-    / benign_df["domain"].str.len().sum()
-)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the benign domain dataset from ranked lists.")
+    parser.add_argument("--umbrella", default="data/top-1m.csv")
+    parser.add_argument("--majestic", default="data/majestic_million.csv")
+    parser.add_argument("-o", "--output", default="data/benign_domains.csv")
+    parser.add_argument("--limit", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args(argv)
 
-print("\nSample domains:")
-print(benign_df.head())
+    build(args.umbrella, args.majestic, args.output, args.limit, args.chunk_size)
 
-# Save
-benign_df.to_csv("data/benign_domains.csv", index=False)
 
-print("Benign dataset created:", benign_df.shape)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
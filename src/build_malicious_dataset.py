@@ -1,27 +1,19 @@
 import pandas as pd
-from urllib.parse import urlparse
 import re
 
+from url_hosts import extract_hosts
+
 # Load OpenPhish feed
 with open("data/feed.txt", "r") as f:
     urls = f.read().splitlines()
 
 df = pd.DataFrame({"url": urls})
 
-# Extract domain
-def extract_domain(url):
-    try:
-        parsed = urlparse(url)
-        domain = parsed.netloc.lower()
-        domain = domain.replace("www.", "")
-        return domain
-    except:
-        return None
-
-df["domain"] = df["url"].apply(extract_domain)
+# Extract domain (same host rules as threat_engine.normalize_url)
+df["domain"] = extract_hosts(df["url"])
 
 # Remove empty
-df = df.dropna()
+df = df[df["domain"] != ""]
 
 # Remove duplicates
 df = df.drop_duplicates(subset=["domain"])
@@ -0,0 +1,276 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import threat_engine
+
+
+# ================================
+# Input
+# ================================
+
+def iter_lines(path):
+    """Yields non-empty lines from a text file (or stdin for '-') lazily."""
+
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8", errors="replace")
+    try:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def iter_csv_column(path, column, chunk_size):
+    import pandas as pd
+
+    for chunk in pd.read_csv(path, usecols=[column], chunksize=chunk_size, dtype=str):
+        for url in chunk[column].dropna():
+            yield url
+
+
+def iter_chunks(urls, chunk_size):
+    while True:
+        chunk = list(islice(urls, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ================================
+# Scoring
+# ================================
+
+def single_threaded(model):
+    """Sets n_jobs=1 on the model and on the forests inside it.
+
+    Scoring workers already run one per core; a forest's own joblib
+    parallelism on top of that oversubscribes the cores, and in daemonic
+    workers sklearn warns and falls back to one job on every predict.
+    """
+
+    estimators = [model, getattr(model, "estimator_", None)]
+    estimators += [c.estimator for c in getattr(model, "calibrated_classifiers_", ())]
+    for estimator in estimators:
+        if getattr(estimator, "n_jobs", None) not in (None, 1):
+            estimator.n_jobs = 1
+
+
+def _init_worker():
+    threat_engine.warm_up(batch_model=True)
+    single_threaded(threat_engine.batch_loader.model)
+
+
+def score_chunk(urls):
+    results = threat_engine.analyze_urls(urls)
+    return [dict(r, url=url) for url, r in zip(urls, results)]
+
+
+# ================================
+# Output Writers
+# ================================
+
+OUTPUT_FIELDS = ["url", "domain", "probability", "prediction", "threat_score", "risk_level", "reasons"]
+
+
+class JsonlWriter:
+
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, rows):
+        for row in rows:
+            self.f.write(json.dumps({k: row[k] for k in OUTPUT_FIELDS}) + "\n")
+
+    def close(self):
+        pass
+
+
+class CsvWriter:
+
+    def __init__(self, f):
+        self.writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
+        self.writer.writeheader()
+
+    def write(self, rows):
+        for row in rows:
+            out = {k: row[k] for k in OUTPUT_FIELDS}
+            out["reasons"] = "; ".join(row["reasons"])
+            self.writer.writerow(out)
+
+    def close(self):
+        pass
+
+
+class ParquetWriter:
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema([
+            ("url", pa.string()),
+            ("domain", pa.string()),
+            ("probability", pa.float64()),
+            ("prediction", pa.int8()),
+            ("threat_score", pa.int16()),
+            ("risk_level", pa.string()),
+            ("reasons", pa.list_(pa.string())),
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        columns = {k: [row[k] for row in rows] for k in OUTPUT_FIELDS}
+        columns["probability"] = [float(p) for p in columns["probability"]]
+        self.writer.write_table(self.pa.table(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def open_writer(path, fmt):
+    if fmt == "parquet":
+        if path == "-":
+            raise ValueError("Parquet output needs a file path")
+        return ParquetWriter(path), None
+
+    f = sys.stdout if path == "-" else open(path, "w", encoding="utf-8", newline="")
+    writer = JsonlWriter(f) if fmt == "jsonl" else CsvWriter(f)
+    return writer, (None if f is sys.stdout else f)
+
+
+def infer_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    return {".csv": "csv", ".parquet": "parquet"}.get(ext, "jsonl")
+
+
+# ================================
+# Progress
+# ================================
+
+class Progress:
+
+    def __init__(self, interval=2.0, stream=sys.stderr):
+        self.interval = interval
+        self.stream = stream
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.count = 0
+
+    def update(self, n):
+        self.count += n
+        now = time.perf_counter()
+        if now - self.last >= self.interval:
+            self.last = now
+            self.report()
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.start
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def report(self, final=False):
+        elapsed = time.perf_counter() - self.start
+        label = "Done" if final else "Scanned"
+        print(
+            f"{label}: {self.count:,} URLs in {elapsed:.1f}s ({self.rate():,.0f} URLs/sec)",
+            file=self.stream, flush=True
+        )
+
+
+# ================================
+# Bulk Scan
+# ================================
+
+def scan(urls, writer, chunk_size=5000, workers=None, progress=None, prefork=False):
+    """Scores an iterable of URLs chunk by chunk and writes results in order.
+
+    At most 2 * workers chunks are in flight at any time, so memory stays
+    bounded no matter how long the input is. With prefork=True the workers
+    are forked from this process after it has loaded the model and share
+    it (see prefork.py) instead of each loading a copy.
+    """
+
+    workers = workers or os.cpu_count() or 1
+    progress = progress or Progress()
+    chunks = iter_chunks(iter(urls), chunk_size)
+
+    if workers == 1:
+        threat_engine.warm_up(batch_model=True)
+        for chunk in chunks:
+            rows = score_chunk(chunk)
+            writer.write(rows)
+            progress.update(len(rows))
+        return progress.count
+
+    if prefork:
+        from prefork import PreforkPool
+
+        with PreforkPool(workers) as pool:
+            for rows in pool.imap(chunks):
+                writer.write(rows)
+                progress.update(len(rows))
+        return progress.count
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        in_flight = deque()
+
+        for chunk in chunks:
+            in_flight.append(pool.submit(score_chunk, chunk))
+
+            if len(in_flight) >= 2 * workers:
+                rows = in_flight.popleft().result()
+                writer.write(rows)
+                progress.update(len(rows))
+
+        while in_flight:
+            rows = in_flight.popleft().result()
+            writer.write(rows)
+            progress.update(len(rows))
+
+    return progress.count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a file of URLs in bulk.")
+    parser.add_argument("input", help="Text file with one URL per line, a CSV with --column, or '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="Output path (default: stdout)")
+    parser.add_argument("-f", "--format", choices=["jsonl", "csv", "parquet"],
+                        help="Output format (default: from the output extension, else jsonl)")
+    parser.add_argument("--column", help="Read URLs from this column of a CSV input")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--prefork", action="store_true",
+                        help="Fork workers from a process that has loaded the model, sharing it")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or infer_format(args.output)
+
+    if args.column:
+        urls = iter_csv_column(args.input, args.column, args.chunk_size)
+    else:
+        urls = iter_lines(args.input)
+
+    writer, f = open_writer(args.output, fmt)
+    progress = Progress()
+
+    try:
+        scan(urls, writer, args.chunk_size, args.workers, progress, args.prefork)
+    finally:
+        writer.close()
+        if f is not None:
+            f.close()
+
+    progress.report(final=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import argparse
+import copy
+import glob
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from calibration import SingleForestCalibratedClassifier, per_row_latency_us
+from feature_cache import FeatureCache
+from forest_engine import ForestEngine, _members, artifact_bytes, load_engine, save_engine
+from model_loader import PICKLE_MODEL_PATH, REPO_ROOT
+from resources import add_budget_args, budget_from_args
+
+
+STRATEGIES = ["subset", "depth", "distill"]
+
+# (n_estimators, max_depth) of the student forests tried by distillation
+DISTILL_SHAPES = [(25, 10), (50, 12), (100, 16)]
+DEPTH_CAPS = [8, 10, 12, 16]
+
+
+# =====================================
+# Data
+# =====================================
+
+def load_splits(data_path, columns, n_jobs=None):
+    """Train, calibration and evaluation rows, plus the held-out domains.
+
+    Uses the same 80/20 split as train_model.py; the 20% the saved model
+    never trained on is halved into calibration and evaluation sets.
+    """
+
+    df = pd.read_csv(data_path)
+    X = FeatureCache(n_jobs=n_jobs).features(df["domain"])[columns]
+    y = df["label"].astype(int)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, stratify=y, random_state=42
+    )
+    X_cal, X_eval, y_cal, y_eval = train_test_split(
+        X_test, y_test, test_size=0.5, stratify=y_test, random_state=42
+    )
+    held_out = df["domain"].loc[X_test.index]
+    return (X_train, y_train), (X_cal, y_cal), (X_eval, y_eval), held_out
+
+
+def teacher_rows(X_train, columns, exclude, n_jobs=None):
+    """Training rows plus every other domain in data/*.csv, for distillation.
+
+    The student only ever sees the teacher's labels, so unlabelled domains
+    are as useful as labelled ones. Held-out domains are left out.
+    """
+
+    frames = [
+        pd.read_csv(path, usecols=["domain"])
+        for path in sorted(glob.glob(os.path.join(REPO_ROOT, "data", "*.csv")))
+    ]
+    domains = pd.concat(frames)["domain"].dropna().astype(str).drop_duplicates()
+    domains = domains[~domains.isin(exclude)]
+
+    extra = FeatureCache(n_jobs=n_jobs).features(domains)[columns]
+    return pd.concat([X_train, extra], ignore_index=True)
+
+
+# =====================================
+# Candidate Models
+# =====================================
+
+def pooled_forest(model):
+    """One forest holding the trees of every member of a saved model."""
+
+    forests = [forest for forest, _ in _members(model)]
+    pooled = copy.deepcopy(forests[0])
+    pooled.estimators_ = [est for forest in forests for est in forest.estimators_]
+    pooled.set_params(n_estimators=len(pooled.estimators_))
+    return pooled
+
+
+def tree_subset(forest, n_trees):
+    subset = copy.copy(forest)
+    subset.estimators_ = forest.estimators_[:n_trees]
+    subset.set_params(n_estimators=n_trees)
+    return subset
+
+
+def subset_candidates(forest):
+    """The first n trees for n = total/2, total/4, ... down to 8.
+
+    Forest trees are independent draws, so any prefix is an unbiased
+    smaller forest.
+    """
+
+    n = len(forest.estimators_) // 2
+    while n >= 8:
+        yield f"subset n={n}", tree_subset(forest, n)
+        n //= 2
+
+
+def depth_candidates(forest, X_train, y_train, n_trees, n_jobs=-1):
+    for depth in DEPTH_CAPS:
+        capped = clone(forest).set_params(
+            max_depth=depth, n_estimators=n_trees, warm_start=False, n_jobs=n_jobs
+        )
+        yield f"depth<={depth} n={n_trees}", capped.fit(X_train, y_train)
+
+
+def distill_candidates(teacher, forest, X_teacher, threshold, n_jobs=-1):
+    """Student forests fitted to the teacher's decisions."""
+
+    y_teacher = (teacher.predict_proba(X_teacher)[:, 1] >= threshold).astype(int)
+
+    for n_trees, depth in DISTILL_SHAPES:
+        student = clone(forest).set_params(
+            n_estimators=n_trees, max_depth=depth, class_weight=None, warm_start=False,
+            n_jobs=n_jobs
+        )
+        yield f"distill n={n_trees} depth<={depth}", student.fit(X_teacher, y_teacher)
+
+
+# =====================================
+# Measurement
+# =====================================
+
+def measure(name, model, X_eval, y_eval, workdir):
+    """Artifact size, load time, per-URL latency and AUC of one model."""
+
+    pickle_path = os.path.join(workdir, "model.pkl")
+    engine_path = os.path.join(workdir, "engine")
+
+    engine = ForestEngine.from_model(model)
+    joblib.dump({"model": model}, pickle_path)
+    save_engine(engine_path, engine, 0.5, list(X_eval.columns))
+
+    start = time.perf_counter()
+    joblib.load(pickle_path)
+    pickle_load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    load_engine(engine_path)
+    engine_load = time.perf_counter() - start
+
+    return {
+        "name": name,
+        "trees": engine.n_trees,
+        "nodes": engine.n_nodes,
+        "pickle_bytes": os.path.getsize(pickle_path),
+        "engine_bytes": artifact_bytes(engine_path),
+        "pickle_load_ms": pickle_load * 1e3,
+        "engine_load_ms": engine_load * 1e3,
+        "sklearn_us_per_url": per_row_latency_us(model.predict_proba, X_eval, rows=20),
+        "engine_us_per_url": per_row_latency_us(
+            engine.predict_proba, np.asarray(X_eval, dtype=np.float64)
+        ),
+        "auc": roc_auc_score(y_eval, model.predict_proba(X_eval)[:, 1]),
+    }
+
+
+def select(report, baseline_auc, tolerance, target_us=None, target_bytes=None):
+    """Smallest candidate within the AUC tolerance that meets the targets."""
+
+    ok = report[
+        (report["name"] != "original")
+        & (report["auc"] >= baseline_auc - tolerance)
+    ]
+    if target_us is not None:
+        ok = ok[ok["engine_us_per_url"] <= target_us]
+    if target_bytes is not None:
+        ok = ok[ok["engine_bytes"] <= target_bytes]
+
+    if ok.empty:
+        return None
+    return ok.sort_values(["engine_bytes", "engine_us_per_url"]).iloc[0]["name"]
+
+
+# =====================================
+# Main
+# =====================================
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Shrink the saved forest to a latency or size budget.")
+    parser.add_argument("--model", default=PICKLE_MODEL_PATH)
+    parser.add_argument("--data", default=os.path.join(REPO_ROOT, "data", "final_balanced_dataset.csv"))
+    parser.add_argument("--strategies", default=",".join(STRATEGIES),
+                        help="Comma-separated subset of: " + ", ".join(STRATEGIES))
+    parser.add_argument("--tolerance", type=float, default=0.005,
+                        help="Largest AUC drop allowed versus the original (default 0.005)")
+    parser.add_argument("--target-latency-us", type=float, default=None,
+                        help="Engine per-URL latency budget in microseconds")
+    parser.add_argument("--target-bytes", type=int, default=None,
+                        help="Engine artifact size budget in bytes")
+    parser.add_argument("--depth-trees", type=int, default=100,
+                        help="Trees per depth-capped refit")
+    parser.add_argument("-o", "--output", default=None,
+                        help="Where to write the selected model "
+                             "(default: <model>.compact.pkl, plus a matching <model>.compact.engine artifact)")
+    parser.add_argument("--report", default=None, help="Also write the report to this CSV")
+    add_budget_args(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    strategies = [s.strip() for s in args.strategies.split(",") if s.strip()]
+    unknown = set(strategies) - set(STRATEGIES)
+    if unknown:
+        raise SystemExit(f"Unknown strategies: {', '.join(sorted(unknown))}")
+
+    saved = joblib.load(args.model)
+    teacher = saved["model"]
+    columns = saved["feature_columns"]
+    threshold = saved["threshold"]
+
+    budget = budget_from_args(args)
+
+    with budget.phase("features"):
+        (X_train, y_train), (X_cal, y_cal), (X_eval, y_eval), held_out = load_splits(
+            args.data, columns, n_jobs=budget.cores
+        )
+    forest = pooled_forest(teacher)
+
+    candidates = []
+    with budget.limit_threads(), budget.phase("candidates"):
+        if "subset" in strategies:
+            candidates.extend(subset_candidates(forest))
+        if "depth" in strategies:
+            candidates.extend(depth_candidates(forest, X_train, y_train, args.depth_trees, budget.cores))
+        if "distill" in strategies:
+            X_teacher = teacher_rows(X_train, columns, held_out, n_jobs=budget.cores)
+            candidates.extend(distill_candidates(teacher, forest, X_teacher, threshold, budget.cores))
+
+        models = {"original": teacher}
+        for name, candidate in candidates:
+            # Every candidate gets its own sigmoid, fitted on rows no tree saw
+            models[name] = SingleForestCalibratedClassifier.from_prefit(candidate, X_cal, y_cal)
+
+    with budget.phase("measure"), tempfile.TemporaryDirectory() as workdir:
+        rows = []
+        for name, model in models.items():
+            rows.append(measure(name, model, X_eval, y_eval, workdir))
+            print(f"Measured {name}")
+    report = pd.DataFrame(rows)
+
+    baseline_auc = report.loc[report["name"] == "original", "auc"].iloc[0]
+    report["auc_drop"] = baseline_auc - report["auc"]
+
+    print("\n--- Compaction Report ---")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.4f}" if abs(v) < 10 else f"{v:,.0f}"))
+    if args.report:
+        report.to_csv(args.report, index=False)
+
+    chosen = select(report, baseline_auc, args.tolerance, args.target_latency_us, args.target_bytes)
+    if chosen is None:
+        print(f"\nNo candidate meets the targets within an AUC drop of {args.tolerance}.")
+        return 1
+
+    output = args.output or os.path.splitext(args.model)[0] + ".compact.pkl"
+    model = models[chosen]
+    joblib.dump({
+        "model": model,
+        "feature_columns": columns,
+        "threshold": threshold,
+        "compacted_from": os.path.basename(args.model),
+        "compaction": chosen,
+    }, output)
+    engine_output = os.path.splitext(output)[0] + ".engine"
+    save_engine(
+        engine_output, ForestEngine.from_model(model), threshold, columns,
+        training_data=args.data,
+        metadata={"compacted_from": os.path.basename(args.model), "compaction": chosen}
+    )
+
+    print(f"\nSelected {chosen}")
+    print(f"Saved {output}\nSaved {engine_output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,65 @@
+import argparse
+
 import pandas as pd
-from urllib.parse import urlparse
 
-df = pd.read_csv("data/Final_Raw_Malicious_Url_Dataset.csv")
+from dataset_stream import CsvAppender, SeenHashes, hash_rows
+from url_hosts import extract_hosts
+
+
+# The raw dataset is processed in chunks: each chunk is converted, its
+# (domain, label) pairs are deduplicated by 64-bit hash against all earlier
+# chunks, and the new pairs are appended to the output. Memory stays flat
+# apart from 8 bytes per distinct pair.
+
+def convert(chunk):
+    # Convert to binary
+    label = (chunk["target"] != 0).astype(int)
+
+    # Extract domain (same host rules as threat_engine.normalize_url)
+    domain = extract_hosts(chunk["url"])
+
+    # Keep required columns
+    return pd.DataFrame({"domain": domain.to_numpy(), "label": label.to_numpy()})
+
+
+def build(input_path, output_path, chunk_size=200_000, limit=None):
+    seen = SeenHashes()
+    counts = {}
+
+    with CsvAppender(output_path) as out:
+        for chunk in pd.read_csv(input_path, usecols=["url", "target"], chunksize=chunk_size):
+            domain_df = convert(chunk)
+
+            # Remove duplicates
+            domain_df = domain_df[seen.add(hash_rows(domain_df))]
+
+            if limit is not None:
+                domain_df = domain_df.head(limit - out.rows)
+
+            out.write(domain_df)
+            for label, n in domain_df["label"].value_counts().items():
+                counts[label] = counts.get(label, 0) + int(n)
+
+            if limit is not None and out.rows >= limit:
+                break
 
-# Convert to binary
-df["label"] = df["target"].apply(lambda x: 0 if x == 0 else 1)
+    print("After conversion:")
+    print((out.rows, 2))
+    print("\nBinary distribution:")
+    print(pd.Series(counts, name="count").rename_axis("label").sort_values(ascending=False))
 
-# Extract domain
-df["domain"] = df["url"].apply(
-    lambda x: urlparse(str(x)).netloc.lower().replace("www.", "")
-)
 
-# Keep required columns
-domain_df = df[["domain", "label"]]
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the raw multiclass URL dataset to binary domains.")
+    parser.add_argument("--input", default="data/Final_Raw_Malicious_Url_Dataset.csv")
+    parser.add_argument("-o", "--output", default="data/domain_binary_dataset.csv")
+    parser.add_argument("--chunk-size", type=int, default=200_000)
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Stop once this many distinct rows have been written")
+    args = parser.parse_args(argv)
 
-# Remove duplicates
-domain_df = domain_df.drop_duplicates()
+    build(args.input, args.output, args.chunk_size, args.limit)
 
-print("After conversion:")
-print(domain_df.shape)
-print("\nBinary distribution:")
-print(domain_df["label"].value_counts())
 
-domain_df.to_csv("data/domain_binary_dataset.csv", index=False)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# ================================
+# Hash-Based Dedup
+# ================================
+
+def hash_strings(values):
+    """64-bit hash of each string (pandas' vectorized siphash)."""
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+def hash_rows(frame):
+    """64-bit hash of each DataFrame row."""
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+class SeenHashes:
+    """Set of uint64 hashes kept as a few sorted arrays.
+
+    New hashes are added as a sorted run; runs are merged whenever the
+    newest is at least half the size of the one before it, so there are
+    only O(log n) runs to search and each hash is re-sorted O(log n)
+    times. Memory is 8 bytes per distinct value. With 64-bit hashes the
+    chance of any collision stays below 1e-3 up to ~100 million values.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    def _seen(self, hashes):
+        seen = np.zeros(len(hashes), dtype=bool)
+        for run in self.runs:
+            idx = np.searchsorted(run, hashes)
+            idx[idx == len(run)] = 0
+            seen |= run[idx] == hashes
+        return seen
+
+    def add(self, hashes):
+        """Adds hashes; returns a mask of the ones not seen before, counting
+        only the first occurrence of repeats within `hashes`."""
+
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        first = np.zeros(len(hashes), dtype=bool)
+        first[np.unique(hashes, return_index=True)[1]] = True
+
+        new = first & ~self._seen(hashes)
+        if new.any():
+            self.runs.append(np.sort(hashes[new]))
+            while len(self.runs) > 1 and 2 * len(self.runs[-1]) >= len(self.runs[-2]):
+                last = self.runs.pop()
+                self.runs[-1] = np.sort(np.concatenate([self.runs[-1], last]))
+
+        return new
+
+
+# ================================
+# Streaming CSV Output
+# ================================
+
+class CsvAppender:
+    """Writes DataFrame chunks to one CSV; the file appears only on close."""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.rows = 0
+        self._header = True
+        self._f = open(self.tmp_path, "w", newline="", encoding="utf-8")
+
+    def write(self, frame):
+        frame.to_csv(self._f, index=False, header=self._header)
+        self._header = False
+        self.rows += len(frame)
+
+    def close(self):
+        self._f.close()
+        os.replace(self.tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._f.close()
+            os.remove(self.tmp_path)
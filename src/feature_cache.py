@@ -0,0 +1,117 @@
+import glob
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from features import FEATURE_COLUMNS, extract_features_parallel, feature_set_version
+from model_loader import REPO_ROOT
+
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "THREAT_FEATURE_CACHE",
+    os.path.join(REPO_ROOT, "cache", "features")
+)
+
+# Merge parts back into one once this many have accumulated
+MAX_PARTS = 32
+
+
+def _rows_hash(domains):
+    h = hashlib.sha256()
+    for d in domains:
+        h.update(d.encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()[:16]
+
+
+# ================================
+# Feature Cache
+# ================================
+
+class FeatureCache:
+    """Extracted feature rows persisted as Parquet, keyed by domain.
+
+    Everything lives under <root>/<feature_set_version()>, so changing the
+    feature code, columns or keyword lists starts a fresh cache instead of
+    serving stale values. Each part file is named by a hash of the domains
+    it holds; domains not seen before are extracted (on n_jobs processes,
+    all cores by default) and written as a new part, so growing a dataset
+    only pays for the new rows.
+    """
+
+    def __init__(self, root=None, version=None, n_jobs=None):
+        self.version = version or feature_set_version()
+        self.n_jobs = n_jobs
+        self.path = os.path.join(root or DEFAULT_CACHE_DIR, self.version)
+        self._table = None
+
+    def _parts(self):
+        return sorted(glob.glob(os.path.join(self.path, "part-*.parquet")))
+
+    def _load(self):
+        if self._table is None:
+            parts = self._parts()
+            if parts:
+                table = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+                table = table.drop_duplicates("domain").set_index("domain")
+            else:
+                table = pd.DataFrame(columns=FEATURE_COLUMNS, dtype=np.float32)
+                table.index.name = "domain"
+            self._table = table
+        return self._table
+
+    def __len__(self):
+        return len(self._load())
+
+    def _write_part(self, frame):
+        os.makedirs(self.path, exist_ok=True)
+        name = f"part-{_rows_hash(frame.index)}.parquet"
+        tmp = os.path.join(self.path, name + ".tmp")
+        frame.reset_index().to_parquet(tmp, index=False)
+        os.replace(tmp, os.path.join(self.path, name))
+
+    def add(self, domains):
+        """Extracts and stores features for the domains not cached yet."""
+
+        table = self._load()
+        unique = pd.unique(pd.Series(domains, dtype=str))
+        missing = unique[~pd.Index(unique).isin(table.index)]
+
+        if len(missing):
+            frame = pd.DataFrame(
+                extract_features_parallel(missing, n_jobs=self.n_jobs), columns=FEATURE_COLUMNS,
+                index=pd.Index(missing, name="domain")
+            )
+            self._write_part(frame)
+            self._table = pd.concat([table, frame]) if len(table) else frame
+
+            if len(self._parts()) > MAX_PARTS:
+                self.compact()
+
+        return len(missing)
+
+    def features(self, domains):
+        """Feature DataFrame for domains, in order, extracting only cache misses."""
+
+        domains = pd.Series(domains, dtype=str)
+        hits = int(domains.isin(self._load().index).sum())
+        added = self.add(domains)
+        print(f"Feature cache {self.version}: {hits:,} of {len(domains):,} rows hit, "
+              f"{added:,} domains extracted")
+
+        return self._load().loc[domains].reset_index(drop=True)
+
+    def compact(self):
+        """Rewrites all parts as a single part."""
+
+        old = self._parts()
+        table = self._load()
+        if len(old) <= 1:
+            return
+        self._write_part(table)
+        keep = os.path.join(self.path, f"part-{_rows_hash(table.index)}.parquet")
+        for path in old:
+            if path != keep:
+                os.remove(path)
@@ -0,0 +1,316 @@
+import hashlib
+import json
+import math
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from keyword_matcher import KeywordMatcher, load_keywords
+
+
+# ================================
+# Feature Set Definition
+# ================================
+
+# Column order of every feature matrix produced here. Training and serving
+# both select from this list, so new features must only ever be appended.
+FEATURE_COLUMNS = [
+    "length",
+    "dot_count",
+    "hyphen_count",
+    "digit_ratio",
+    "entropy",
+    "suspicious_word",
+    "has_ip",
+    "risky_tld",
+    "brand_in_domain",
+    "subdomain_count",
+    "vowel_ratio",
+    "suspicious_word_count",
+    "brand_count",
+    "keyword_first_pos",
+]
+
+# Keyword and brand lists live in data/keywords/*.txt and are matched with
+# one Aho-Corasick pass per domain, so they can grow to thousands of entries
+
+SUSPICIOUS_WORDS = load_keywords("suspicious_words")
+POPULAR_BRANDS = load_keywords("brands")
+RISKY_TLDS = ["xyz", "top", "club", "live", "online", "site", "info"]
+
+SUSPICIOUS_MATCHER = KeywordMatcher(SUSPICIOUS_WORDS)
+BRAND_MATCHER = KeywordMatcher(POPULAR_BRANDS)
+
+# Bump whenever the extraction code changes what it computes
+FEATURE_CODE_VERSION = 1
+
+
+def feature_set_version():
+    """Short hash of everything that determines feature values."""
+
+    spec = json.dumps({
+        "code": FEATURE_CODE_VERSION,
+        "columns": FEATURE_COLUMNS,
+        "suspicious_words": SUSPICIOUS_WORDS,
+        "brands": POPULAR_BRANDS,
+        "risky_tlds": RISKY_TLDS,
+    }, sort_keys=True)
+    return hashlib.sha256(spec.encode()).hexdigest()[:16]
+
+DIGITS = "0123456789"
+VOWELS = "aeiou"
+
+IP_PATTERN = r"[0-9]+\.[0-9]+\.[0-9]+\.[0-9]+"
+_IP_RE = re.compile(IP_PATTERN)
+
+_RISKY_TLD_PATTERN = r"(?:^|\.)(?:" + "|".join(re.escape(t) for t in RISKY_TLDS) + r")$"
+
+# ASCII lookup table for vowels; code points >= 127 are clipped onto DEL
+_VOWEL_LUT = np.zeros(128, dtype=bool)
+_VOWEL_LUT[[ord(c) for c in VOWELS]] = True
+
+
+# ================================
+# Entropy Tables
+# ================================
+
+# Both extractors read c*log2(c) and log2(n) from the same tables and add the
+# per-character terms in code point order, so the scalar and batch entropy
+# values are bit-identical.
+
+_XLOG2X = [0.0]
+_LOG2 = [0.0]
+
+
+def _grow_tables(n):
+    while len(_XLOG2X) <= n:
+        c = len(_XLOG2X)
+        _XLOG2X.append(c * math.log2(c))
+        _LOG2.append(math.log2(c))
+
+
+def domain_entropy(domain):
+    length = len(domain)
+    if not length:
+        return 0.0
+
+    _grow_tables(length)
+
+    acc = 0.0
+    for _, count in sorted(Counter(domain).items()):
+        acc += _XLOG2X[count]
+
+    return _LOG2[length] - acc / length
+
+
+# ================================
+# Single Domain Extraction
+# ================================
+
+def _brand_in_domain(domain, brand_hits):
+    # A brand counts unless the domain is the brand's own (<brand>.<tld>...)
+    return int(any(
+        not domain.startswith(POPULAR_BRANDS[idx] + ".") for _, idx in brand_hits
+    ))
+
+
+def extract_features(domain):
+    domain = domain.lower()
+    features = {}
+
+    length = len(domain)
+    dot_count = domain.count(".")
+
+    features["length"] = length
+    features["dot_count"] = dot_count
+    features["hyphen_count"] = domain.count("-")
+    features["digit_ratio"] = sum(c in DIGITS for c in domain) / length if length else 0.0
+    features["entropy"] = domain_entropy(domain)
+
+    keyword_hits = SUSPICIOUS_MATCHER.find_all(domain)
+    brand_hits = BRAND_MATCHER.find_all(domain)
+
+    features["suspicious_word"] = int(bool(keyword_hits))
+
+    features["has_ip"] = int(bool(_IP_RE.fullmatch(domain)))
+
+    features["risky_tld"] = int(domain.rsplit(".", 1)[-1] in RISKY_TLDS)
+
+    features["brand_in_domain"] = _brand_in_domain(domain, brand_hits)
+
+    features["subdomain_count"] = max(dot_count - 1, 0)
+
+    features["vowel_ratio"] = sum(c in VOWELS for c in domain) / length if length else 0.0
+
+    features["suspicious_word_count"] = len(keyword_hits)
+    features["brand_count"] = len(brand_hits)
+    features["keyword_first_pos"] = min(
+        (start for start, _ in keyword_hits + brand_hits), default=-1
+    )
+
+    return features
+
+
+# ================================
+# Batch Extraction
+# ================================
+
+def _char_features(values):
+    """Character-count features for one chunk, from a padded code point matrix."""
+
+    n = len(values)
+    codes = np.array(values, dtype=np.str_)
+    width = codes.dtype.itemsize // 4
+
+    if width == 0:
+        zeros = np.zeros(n, dtype=np.int64)
+        return zeros, zeros, zeros, zeros, zeros, np.zeros(n)
+
+    codes = codes.view(np.uint32).reshape(n, width)
+
+    lengths = np.count_nonzero(codes, axis=1)
+    dots = np.count_nonzero(codes == ord("."), axis=1)
+    hyphens = np.count_nonzero(codes == ord("-"), axis=1)
+    digits = np.count_nonzero(codes - ord("0") < 10, axis=1)
+    vowels = np.count_nonzero(_VOWEL_LUT[np.minimum(codes, 127)], axis=1)
+
+    # Sorting each row groups equal characters into runs (padding sorts
+    # first); the length of every run is its character count.
+    codes.sort(axis=1)
+
+    pos = np.arange(width)
+    new_run = np.ones(codes.shape, dtype=bool)
+    new_run[:, 1:] = codes[:, 1:] != codes[:, :-1]
+    run_end = np.ones(codes.shape, dtype=bool)
+    run_end[:, :-1] = new_run[:, 1:]
+    run_end &= codes != 0
+
+    starts = np.maximum.accumulate(np.where(new_run, pos, 0), axis=1)
+    counts = pos - starts + 1
+
+    _grow_tables(width)
+    xlog2x = np.array(_XLOG2X[:width + 1])
+    log2 = np.array(_LOG2[:width + 1])
+
+    contrib = np.where(run_end, xlog2x[counts], 0.0)
+    acc = np.zeros(n)
+    for j in range(width):
+        acc += contrib[:, j]
+
+    safe_lengths = np.maximum(lengths, 1)
+    entropy = np.where(lengths > 0, log2[lengths] - acc / safe_lengths, 0.0)
+
+    return lengths, dots, hyphens, digits, vowels, entropy
+
+
+def extract_features_batch(domains, columns=None, dtype=np.float32, chunk_size=16384):
+    """Extracts features for a whole array of domains at once.
+
+    Returns a (len(domains), len(columns)) matrix whose columns follow
+    `columns` (FEATURE_COLUMNS by default). Values match extract_features.
+    """
+
+    columns = list(columns or FEATURE_COLUMNS)
+    unknown = [c for c in columns if c not in FEATURE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown feature columns: {unknown}")
+
+    s = pd.Series(domains, dtype="string[pyarrow]").fillna("").str.lower()
+    n = len(s)
+    out = np.empty((n, len(columns)), dtype=dtype)
+
+    if n == 0:
+        return out
+
+    # String kernels (pyarrow) for the pattern features
+    flags = {
+        "has_ip": s.str.fullmatch(IP_PATTERN),
+        "risky_tld": s.str.contains(_RISKY_TLD_PATTERN, regex=True),
+    }
+    flags = {k: v.to_numpy(dtype=bool) for k, v in flags.items()}
+
+    # One automaton pass per domain for all keywords and brands
+    values = s.tolist()
+    keyword_count = np.zeros(n, dtype=np.int64)
+    brand_count = np.zeros(n, dtype=np.int64)
+    first_pos = np.full(n, -1, dtype=np.int64)
+    brand = np.zeros(n, dtype=bool)
+
+    for row, domain in enumerate(values):
+        keyword_hits = SUSPICIOUS_MATCHER.find_all(domain)
+        brand_hits = BRAND_MATCHER.find_all(domain)
+        if keyword_hits or brand_hits:
+            keyword_count[row] = len(keyword_hits)
+            brand_count[row] = len(brand_hits)
+            first_pos[row] = min(start for start, _ in keyword_hits + brand_hits)
+            brand[row] = _brand_in_domain(domain, brand_hits)
+
+    flags["suspicious_word"] = keyword_count > 0
+    flags["brand_in_domain"] = brand
+    flags["suspicious_word_count"] = keyword_count
+    flags["brand_count"] = brand_count
+    flags["keyword_first_pos"] = first_pos
+
+    # NumPy character counts. Rows are processed shortest first so each
+    # chunk is padded only to the longest domain of similar length.
+    order = np.argsort(s.str.len().to_numpy(dtype=np.int64), kind="stable")
+
+    for start in range(0, n, chunk_size):
+        rows = order[start:start + chunk_size]
+        lengths, dots, hyphens, digits, vowels, entropy = _char_features(
+            [values[i] for i in rows]
+        )
+        safe_lengths = np.maximum(lengths, 1)
+
+        chunk = {
+            "length": lengths,
+            "dot_count": dots,
+            "hyphen_count": hyphens,
+            "digit_ratio": np.where(lengths > 0, digits / safe_lengths, 0.0),
+            "entropy": entropy,
+            "subdomain_count": np.maximum(dots - 1, 0),
+            "vowel_ratio": np.where(lengths > 0, vowels / safe_lengths, 0.0),
+        }
+
+        for j, col in enumerate(columns):
+            if col in chunk:
+                out[rows, j] = chunk[col]
+            else:
+                out[rows, j] = flags[col][rows]
+
+    return out
+
+
+def _extract_chunk(args):
+    domains, columns, dtype = args
+    return extract_features_batch(domains, columns, dtype)
+
+
+def extract_features_parallel(domains, columns=None, dtype=np.float32, n_jobs=None,
+                              min_chunk=20000):
+    """extract_features_batch split across a process pool.
+
+    The domains are cut into contiguous chunks (about four per worker, at
+    least min_chunk rows each) and the results are stacked back in input
+    order. Every row is computed independently, so the output is
+    bit-identical to a serial extract_features_batch call. Inputs too
+    small for two chunks are extracted in this process.
+    """
+
+    values = pd.Series(domains, dtype=object).tolist()
+    n = len(values)
+    n_jobs = n_jobs or os.cpu_count() or 1
+
+    n_chunks = min(4 * n_jobs, n // min_chunk)
+    if n_jobs == 1 or n_chunks < 2:
+        return extract_features_batch(values, columns, dtype)
+
+    bounds = np.linspace(0, n, n_chunks + 1).astype(int)
+    tasks = [(values[a:b], columns, dtype) for a, b in zip(bounds[:-1], bounds[1:])]
+
+    with ProcessPoolExecutor(max_workers=min(n_jobs, n_chunks)) as pool:
+        return np.concatenate(list(pool.map(_extract_chunk, tasks)))
@@ -0,0 +1,456 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+
+# ================================
+# Calibrator Kinds
+# ================================
+
+CAL_NONE = 0
+CAL_SIGMOID = 1
+CAL_ISOTONIC = 2
+
+
+# ================================
+# Export
+# ================================
+
+def _members(model):
+    """Yields (forest, calibrator) pairs for the supported model types."""
+
+    if hasattr(model, "calibrated_classifiers_"):
+        for member in model.calibrated_classifiers_:
+            if len(member.calibrators) != 1:
+                raise ValueError("Only binary calibrated models can be exported")
+            yield member.estimator, member.calibrators[0]
+    elif hasattr(model, "estimators_"):
+        yield model, None
+    else:
+        raise TypeError(f"Cannot export model of type {type(model).__name__}")
+
+
+def _calibrator_params(calibrator):
+    if calibrator is None:
+        return CAL_NONE, 0.0, 0.0, np.empty(0), np.empty(0)
+    if hasattr(calibrator, "a_"):
+        return CAL_SIGMOID, float(calibrator.a_), float(calibrator.b_), np.empty(0), np.empty(0)
+    if hasattr(calibrator, "X_thresholds_"):
+        return (
+            CAL_ISOTONIC, 0.0, 0.0,
+            np.asarray(calibrator.X_thresholds_, dtype=np.float64),
+            np.asarray(calibrator.y_thresholds_, dtype=np.float64),
+        )
+    raise TypeError(f"Unsupported calibrator {type(calibrator).__name__}")
+
+
+NODE_DTYPE = np.dtype([
+    ("feature", np.int32),
+    ("threshold", np.float32),
+    ("left", np.int32),
+    ("right", np.int32),
+])
+
+
+def _float32_floor(threshold):
+    """Largest float32 <= each float64 threshold.
+
+    Trees compare float32 inputs against float64 thresholds; for float32 x,
+    x <= t holds exactly when x <= floor32(t), so the packed node table can
+    store float32 thresholds without changing any split decision.
+    """
+
+    t32 = threshold.astype(np.float32)
+    above = t32.astype(np.float64) > threshold
+    t32[above] = np.nextafter(t32[above], np.float32(-np.inf))
+    return t32
+
+
+def export_forest(model):
+    """Flattens every tree of a fitted forest model into node tables.
+
+    `model` is a RandomForestClassifier or a CalibratedClassifierCV over
+    forests. Returns a dict of contiguous NumPy arrays for ForestEngine.
+    Splits are packed into one NODE_DTYPE record per node; a child index
+    < 0 points to leaf ~index, so traversal can tell it reached a leaf
+    without another lookup.
+    """
+
+    nodes, value = [], []
+    roots, tree_member = [], []
+    cal_kind, cal_a, cal_b = [], [], []
+    iso_x, iso_y, iso_offsets = [], [], [0]
+    offset = 0
+
+    for m, (forest, calibrator) in enumerate(_members(model)):
+        if len(forest.classes_) != 2:
+            raise ValueError("Only binary classifiers can be exported")
+
+        for est in forest.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left == -1
+
+            def encode(children):
+                ids = np.where(is_leaf, 0, children)
+                return np.where(is_leaf[ids], ~(ids + offset), ids + offset)
+
+            counts = tree.value[:, 0, :]
+            totals = counts.sum(axis=1)
+            totals[totals == 0] = 1.0
+
+            table = np.zeros(n, dtype=NODE_DTYPE)
+            table["feature"] = np.where(is_leaf, 0, tree.feature)
+            table["threshold"] = _float32_floor(tree.threshold)
+            table["left"] = encode(tree.children_left)
+            table["right"] = encode(tree.children_right)
+
+            nodes.append(table)
+            value.append(counts[:, 1] / totals)
+
+            roots.append(~offset if is_leaf[0] else offset)
+            tree_member.append(m)
+            offset += n
+
+        kind, a, b, xs, ys = _calibrator_params(calibrator)
+        cal_kind.append(kind)
+        cal_a.append(a)
+        cal_b.append(b)
+        iso_x.append(xs)
+        iso_y.append(ys)
+        iso_offsets.append(iso_offsets[-1] + len(xs))
+
+    return {
+        "nodes": np.concatenate(nodes),
+        "value": np.concatenate(value).astype(np.float64),
+        "roots": np.asarray(roots, dtype=np.int32),
+        "tree_member": np.asarray(tree_member, dtype=np.int32),
+        "cal_kind": np.asarray(cal_kind, dtype=np.int32),
+        "cal_a": np.asarray(cal_a, dtype=np.float64),
+        "cal_b": np.asarray(cal_b, dtype=np.float64),
+        "iso_x": np.concatenate(iso_x).astype(np.float64),
+        "iso_y": np.concatenate(iso_y).astype(np.float64),
+        "iso_offsets": np.asarray(iso_offsets, dtype=np.int64),
+    }
+
+
+# ================================
+# Inference Engine
+# ================================
+
+# Rows are traversed in blocks of at most this many (row, tree) pairs, so
+# the working arrays stay a few MB (and in cache) whatever the batch size
+BLOCK_PAIRS = 1 << 16
+
+class ForestEngine:
+    """Vectorized inference over flattened forest node tables.
+
+    All (row, tree) pairs advance one level per step and finished pairs
+    drop out, so a single row costs a few dozen NumPy calls regardless of
+    the number of trees. predict_proba matches the exported sklearn
+    model's predict_proba to within floating-point tolerance.
+    """
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.nodes = arrays["nodes"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+
+        tree_member = arrays["tree_member"]
+        self.n_members = len(arrays["cal_kind"])
+        self.member_slices = []
+        for m in range(self.n_members):
+            idx = np.flatnonzero(tree_member == m)
+            self.member_slices.append(slice(idx[0], idx[-1] + 1))
+
+    @classmethod
+    def from_model(cls, model):
+        return cls(export_forest(model))
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.nodes)
+
+    def _blocks(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        rows = max(1, BLOCK_PAIRS // max(1, len(self.roots)))
+        for start in range(0, max(len(X), 1), rows):
+            yield X[start:start + rows]
+
+    def apply(self, X):
+        """Returns the leaf node index reached by each row in each tree."""
+        return np.concatenate([self._apply_block(block) for block in self._blocks(X)])
+
+    def _apply_block(self, X):
+        n, n_features = X.shape
+        n_trees = len(self.roots)
+
+        flat_x = X.ravel()
+        leaves = np.empty(n * n_trees, dtype=np.int32)
+
+        node = np.tile(self.roots, n)
+        pos = np.arange(n * n_trees)
+        base = np.repeat(np.arange(n, dtype=np.int64) * n_features, n_trees)
+
+        while pos.size:
+            done = node < 0
+            if done.any():
+                leaves[pos[done]] = ~node[done]
+                keep = ~done
+                pos, node, base = pos[keep], node[keep], base[keep]
+                if not pos.size:
+                    break
+
+            rec = self.nodes[node]
+            go_left = flat_x[base + rec["feature"]] <= rec["threshold"]
+            node = np.where(go_left, rec["left"], rec["right"])
+
+        return leaves.reshape(n, n_trees)
+
+    def _calibrate(self, m, scores):
+        kind = self.arrays["cal_kind"][m]
+        if kind == CAL_SIGMOID:
+            a, b = self.arrays["cal_a"][m], self.arrays["cal_b"][m]
+            return 1.0 / (1.0 + np.exp(a * scores + b))
+        if kind == CAL_ISOTONIC:
+            lo, hi = self.arrays["iso_offsets"][m], self.arrays["iso_offsets"][m + 1]
+            return np.interp(scores, self.arrays["iso_x"][lo:hi], self.arrays["iso_y"][lo:hi])
+        return scores
+
+    def _positive(self, X):
+        leaf_values = self.value[self._apply_block(X)]
+
+        pos = np.zeros(leaf_values.shape[0])
+        for m, sl in enumerate(self.member_slices):
+            pos += self._calibrate(m, leaf_values[:, sl].mean(axis=1))
+        return pos / self.n_members
+
+    def predict_proba(self, X):
+        pos = np.concatenate([self._positive(block) for block in self._blocks(X)])
+
+        pos[(pos > 1.0) & (pos <= 1.0 + 1e-5)] = 1.0
+        return np.column_stack([1.0 - pos, pos])
+
+
+# ================================
+# Artifact I/O
+# ================================
+
+# An exported model is a directory: one .npy file per engine array plus a
+# manifest.json describing them. Loading reads the manifest and maps the
+# arrays (mmap_mode="r" by default), so it takes milliseconds, runs no
+# pickle code, and every process serving the same artifact shares one
+# copy of the trees in the page cache.
+
+ARTIFACT_FORMAT = "threat-forest-engine"
+ARTIFACT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def is_artifact(path):
+    return os.path.isfile(os.path.join(path, MANIFEST_NAME))
+
+
+def artifact_bytes(path):
+    """Size of an artifact directory on disk."""
+
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def _swap_dir(tmp, path):
+    """Moves the finished directory tmp to path, replacing any old one.
+
+    Processes that already mapped the old arrays keep reading them; the
+    files are only freed once the last mapping goes away.
+    """
+
+    old = None
+    if os.path.exists(path):
+        old = f"{path}.old-{os.getpid()}"
+        os.replace(path, old)
+    os.replace(tmp, path)
+    if old:
+        shutil.rmtree(old)
+
+
+def save_engine(path, engine, threshold, feature_columns, training_data=None, metadata=None):
+    """Writes engine as an artifact directory at path and returns the manifest.
+
+    training_data is a path (or list of paths) whose sha256 is recorded;
+    metadata is any extra JSON-serializable info to keep in the manifest.
+    """
+
+    from features import feature_set_version
+
+    if isinstance(training_data, str):
+        training_data = [training_data]
+
+    # mkdir, not makedirs: a missing parent directory means a wrong path
+    tmp = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.mkdir(tmp)
+
+    arrays = {}
+    for name, array in engine.arrays.items():
+        file_name = f"{name}.npy"
+        np.save(os.path.join(tmp, file_name), np.ascontiguousarray(array))
+        arrays[name] = {
+            "file": file_name,
+            "dtype": np.lib.format.dtype_to_descr(array.dtype),
+            "shape": list(array.shape),
+            "sha256": file_sha256(os.path.join(tmp, file_name)),
+        }
+
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "format_version": ARTIFACT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "feature_columns": list(feature_columns),
+        "feature_set_version": feature_set_version(),
+        "threshold": float(threshold),
+        "n_trees": engine.n_trees,
+        "n_nodes": engine.n_nodes,
+        "training_data": {
+            os.path.basename(p): file_sha256(p) for p in training_data or []
+        },
+        "metadata": metadata or {},
+        "arrays": arrays,
+    }
+
+    with open(os.path.join(tmp, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    _swap_dir(tmp, path)
+    return manifest
+
+
+def copy_artifact(src, dst):
+    """Copies an artifact directory over dst, replacing it atomically."""
+
+    tmp = f"{dst}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    shutil.copytree(src, tmp)
+    _swap_dir(tmp, dst)
+
+
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"{path} is not a {ARTIFACT_FORMAT} artifact")
+    if manifest.get("format_version", 0) > ARTIFACT_VERSION:
+        raise ValueError(
+            f"{path} uses artifact format {manifest['format_version']}, "
+            f"this code reads up to {ARTIFACT_VERSION}"
+        )
+    return manifest
+
+
+def _manifest_dtype(descr):
+    # JSON turns the (name, type) pairs of a structured dtype into lists
+    if isinstance(descr, list):
+        descr = [tuple(field) for field in descr]
+    return np.lib.format.descr_to_dtype(descr)
+
+
+def _validate(path, manifest, arrays, expected_columns):
+    for name, spec in manifest["arrays"].items():
+        array = arrays[name]
+        if array.dtype != _manifest_dtype(spec["dtype"]) or list(array.shape) != spec["shape"]:
+            raise ValueError(
+                f"{path}: {name} is {array.dtype}{list(array.shape)}, "
+                f"manifest says {spec['dtype']}{spec['shape']}"
+            )
+
+    columns = manifest["feature_columns"]
+    n_features = len(columns)
+    if len(arrays["nodes"]) and arrays["nodes"]["feature"].max() >= n_features:
+        raise ValueError(f"{path}: trees split on features beyond the {n_features} listed in the manifest")
+
+    if expected_columns is not None:
+        unknown = [c for c in columns if c not in expected_columns]
+        if unknown:
+            raise ValueError(f"{path}: model expects features this code does not produce: {unknown}")
+
+
+def load_engine(path, mmap_mode="r", expected_columns=None, verify=False):
+    """Loads an artifact directory in the same dict shape as the pickle.
+
+    expected_columns (the feature names the caller can produce) is checked
+    against the manifest's feature order; verify=True also re-hashes every
+    array file.
+    """
+
+    manifest = read_manifest(path)
+
+    arrays = {}
+    for name, spec in manifest["arrays"].items():
+        array_path = os.path.join(path, spec["file"])
+        if verify and file_sha256(array_path) != spec["sha256"]:
+            raise ValueError(f"{path}: {spec['file']} does not match its manifest checksum")
+        # asarray drops the np.memmap subclass (and its per-operation
+        # overhead) but keeps the mapping
+        arrays[name] = np.asarray(np.load(array_path, mmap_mode=mmap_mode, allow_pickle=False))
+
+    _validate(path, manifest, arrays, expected_columns)
+
+    return {
+        "model": ForestEngine(arrays),
+        "threshold": manifest["threshold"],
+        "feature_columns": manifest["feature_columns"],
+        "manifest": manifest,
+    }
+
+
+# ================================
+# Export CLI
+# ================================
+
+def main(argv=None):
+    import argparse
+    import joblib
+    from model_loader import PICKLE_MODEL_PATH, ENGINE_MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Export a pickled forest model as an engine artifact.")
+    parser.add_argument("src", nargs="?", default=PICKLE_MODEL_PATH)
+    parser.add_argument("dst", nargs="?", default=ENGINE_MODEL_PATH)
+    parser.add_argument("--training-data", action="append", default=[],
+                        help="Dataset the model was trained on, hashed into the manifest (repeatable)")
+    parser.add_argument("--verify", metavar="ARTIFACT",
+                        help="Check an exported artifact against its manifest instead of exporting")
+    args = parser.parse_args(argv)
+
+    if args.verify:
+        data = load_engine(args.verify, verify=True)
+        print(f"{args.verify}: OK ({data['manifest']['n_trees']} trees, "
+              f"{len(data['feature_columns'])} features)")
+        return
+
+    data = joblib.load(args.src)
+    engine = ForestEngine.from_model(data["model"])
+    save_engine(args.dst, engine, data["threshold"], data["feature_columns"],
+                training_data=args.training_data, metadata={"source": os.path.basename(args.src)})
+
+    print(f"Exported {engine.n_trees} trees ({engine.n_nodes} nodes) to {args.dst}")
+
+
+if __name__ == "__main__":
+    main()
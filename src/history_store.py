@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import threading
+import time
+
+from model_loader import REPO_ROOT
+
+
+DEFAULT_HISTORY_PATH = os.environ.get(
+    "THREAT_HISTORY_DB",
+    os.path.join(REPO_ROOT, "scan_history.db")
+)
+
+RISK_LEVELS = ["HIGH", "MEDIUM", "LOW"]
+
+
+# risk_counts is kept up to date by triggers, so the dashboard totals are a
+# three-row read no matter how many scans are stored.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id          INTEGER PRIMARY KEY,
+    ts          REAL    NOT NULL,
+    url         TEXT    NOT NULL,
+    domain      TEXT    NOT NULL,
+    risk        TEXT    NOT NULL,
+    score       INTEGER NOT NULL,
+    probability REAL    NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS scans_ts ON scans (ts);
+CREATE INDEX IF NOT EXISTS scans_risk_ts ON scans (risk, ts);
+CREATE INDEX IF NOT EXISTS scans_domain_ts ON scans (domain, ts);
+
+CREATE TABLE IF NOT EXISTS risk_counts (
+    risk TEXT PRIMARY KEY,
+    n    INTEGER NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS scans_count_insert AFTER INSERT ON scans
+BEGIN
+    INSERT INTO risk_counts (risk, n) VALUES (NEW.risk, 1)
+    ON CONFLICT (risk) DO UPDATE SET n = n + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS scans_count_delete AFTER DELETE ON scans
+BEGIN
+    UPDATE risk_counts SET n = n - 1 WHERE risk = OLD.risk;
+END;
+"""
+
+
+class HistoryStore:
+    """Scan history in a local SQLite database.
+
+    Indexed by time, by risk level and by domain, so a page of history
+    or a filtered view costs the same with a hundred scans or a million.
+    One connection is shared by all threads of the process behind a lock;
+    WAL mode lets other processes read while this one writes.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_HISTORY_PATH
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    # ----- writes -----
+
+    def add_many(self, results, ts=None):
+        """Stores analyze_url result dicts; each needs a "url" key or a domain."""
+
+        ts = time.time() if ts is None else ts
+        rows = [
+            (
+                ts, r.get("url") or r["domain"], r["domain"], r["risk_level"],
+                int(r["threat_score"]), float(r["probability"]),
+            )
+            for r in results
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO scans (ts, url, domain, risk, score, probability) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def add(self, result, url=None):
+        self.add_many([dict(result, url=url or result.get("url"))])
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM scans")
+            self._conn.execute("DELETE FROM risk_counts")
+
+    # ----- reads -----
+
+    def counts(self):
+        """{"TOTAL": n, "HIGH": n, "MEDIUM": n, "LOW": n} from the aggregates table."""
+
+        with self._lock:
+            rows = self._conn.execute("SELECT risk, n FROM risk_counts").fetchall()
+        counts = {risk: 0 for risk in RISK_LEVELS}
+        counts.update({row["risk"]: row["n"] for row in rows})
+        counts["TOTAL"] = sum(row["n"] for row in rows)
+        return counts
+
+    def _where(self, risk, domain):
+        clauses, params = [], []
+        if risk:
+            clauses.append("risk = ?")
+            params.append(risk)
+        if domain:
+            clauses.append("domain = ?")
+            params.append(domain)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def count(self, risk=None, domain=None):
+        if not domain:
+            counts = self.counts()
+            return counts[risk] if risk else counts["TOTAL"]
+
+        where, params = self._where(risk, domain)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM scans{where}", params).fetchone()[0]
+
+    def page(self, page=0, page_size=20, risk=None, domain=None):
+        """Newest-first scans for page `page` (0-based), optionally filtered."""
+
+        where, params = self._where(risk, domain)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT ts, url, domain, risk, score, probability FROM scans{where} "
+                "ORDER BY ts DESC, id DESC LIMIT ? OFFSET ?",
+                params + [page_size, page * page_size]
+            ).fetchall()
+        return [dict(row) for row in rows]
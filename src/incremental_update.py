@@ -0,0 +1,255 @@
+import argparse
+import math
+import os
+import shutil
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.utils.class_weight import compute_class_weight
+
+from calibration import SingleForestCalibratedClassifier
+from feature_cache import FeatureCache
+from forest_engine import ForestEngine, copy_artifact, save_engine
+from model_loader import PICKLE_MODEL_PATH, REPO_ROOT
+from resources import add_budget_args, budget_from_args
+
+
+# =====================================
+# Load
+# =====================================
+
+def _forest_of(model):
+    """The single fitted forest inside a saved model."""
+
+    if isinstance(model, SingleForestCalibratedClassifier):
+        return model.estimator_
+    if hasattr(model, "estimators_"):
+        return model
+    raise TypeError(
+        f"Cannot update a {type(model).__name__}: retrain with "
+        "`train_model.py --calibration oob` (or holdout) to get a single forest first"
+    )
+
+
+def load_rows(batch_path, baseline_path, replay, seed=42):
+    """New labelled rows plus a class-balanced replay sample of the baseline.
+
+    Feed batches are often all malicious; replaying baseline rows keeps both
+    classes in every fit and stops the new trees forgetting benign domains.
+    """
+
+    batch = pd.read_csv(batch_path, usecols=["domain", "label"]).dropna().assign(replayed=False)
+    frames = [batch]
+
+    if replay and baseline_path:
+        baseline = pd.read_csv(baseline_path, usecols=["domain", "label"]).dropna()
+        baseline = baseline[~baseline["domain"].isin(batch["domain"])]
+        per_class = replay // 2
+        frames.extend(
+            group.sample(n=min(per_class, len(group)), random_state=seed).assign(replayed=True)
+            for _, group in baseline.groupby("label")
+        )
+
+    rows = pd.concat(frames, ignore_index=True).drop_duplicates("domain").reset_index(drop=True)
+    print(f"Update rows: {len(batch):,} new + {len(rows) - len(batch):,} replayed "
+          f"({rows['label'].value_counts().to_dict()})")
+    return rows
+
+
+# =====================================
+# Update
+# =====================================
+
+def update_forest(forest, X, y, add_trees, drop_oldest=0):
+    """Grows the fitted forest by add_trees trees fitted on X, y, then drops
+    the drop_oldest oldest trees."""
+
+    start = len(forest.estimators_)
+
+    missing = set(forest.classes_.tolist()) - set(np.unique(y).tolist())
+    if missing:
+        raise ValueError(f"y has no rows of class {sorted(missing)}; new trees need every class")
+
+    # sklearn warns against "balanced" presets with warm_start (each fit
+    # would weight by its own rows); the new trees get the equivalent
+    # explicit weights for this batch and the preset is restored afterwards
+    class_weight = forest.class_weight
+    if class_weight in ("balanced", "balanced_subsample"):
+        classes = forest.classes_
+        weights = compute_class_weight("balanced", classes=classes, y=y)
+        forest.set_params(class_weight=dict(zip(classes.tolist(), weights)))
+
+    forest.set_params(warm_start=True, oob_score=False, n_estimators=start + add_trees)
+    forest.fit(X, y)
+    forest.set_params(class_weight=class_weight)
+
+    if drop_oldest:
+        drop_oldest = min(drop_oldest, start)
+        forest.estimators_ = forest.estimators_[drop_oldest:]
+        forest.set_params(n_estimators=len(forest.estimators_))
+
+    forest.set_params(warm_start=False)
+    return forest
+
+
+def holdout_split(X, y, test_size, what):
+    """train_test_split holding out test_size of the rows, stratified when
+    every class can appear on both sides. Exits when there are too few
+    rows to hold any out; `what` names the held-out rows in the message."""
+
+    # train_test_split rounds a fractional test size up
+    n_test = math.ceil(test_size * len(y))
+    if n_test < 1 or n_test >= len(y):
+        raise SystemExit(f"{len(y):,} rows are too few to hold out {what} ({test_size:g} of them)")
+
+    counts = y.value_counts()
+    stratified = len(counts) > 1 and counts.min() >= 2 and min(n_test, len(y) - n_test) >= len(counts)
+    return train_test_split(X, y, test_size=test_size, stratify=y if stratified else None, random_state=42)
+
+
+def require_classes(y, classes, what):
+    """Exits unless y has rows of every class the forest predicts."""
+
+    missing = sorted(set(classes.tolist()) - set(y.unique().tolist()))
+    if missing:
+        raise SystemExit(
+            f"The rows left to {what} have no label {missing}. A batch with one class "
+            "needs baseline rows mixed in: raise --replay."
+        )
+
+
+def holdout_scores(model, X, y, threshold):
+    """Accuracy at the decision threshold, plus AUC when y has both classes."""
+
+    proba = model.predict_proba(X)[:, 1]
+    scores = {"accuracy": float(((proba >= threshold) == y).mean())}
+    if y.nunique() == 2:
+        scores["auc"] = float(roc_auc_score(y, proba))
+    return scores
+
+
+def engine_path_for(model_path):
+    """models/final_rf_model.pkl -> models/final_rf_engine
+
+    Only the file name is rewritten (its last "_model" becomes "_engine");
+    a name without "_model" gets "_engine" appended.
+    """
+
+    directory, name = os.path.split(os.path.splitext(model_path)[0])
+    head, sep, tail = name.rpartition("_model")
+    name = head + "_engine" + tail if sep else name + "_engine"
+    return os.path.join(directory, name)
+
+
+def versioned_path(base_path, version):
+    root, ext = os.path.splitext(base_path)
+    return f"{root}.{version}{ext}"
+
+
+# =====================================
+# Main
+# =====================================
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Update the saved forest from a new labelled batch.")
+    parser.add_argument("batch", help="CSV with domain,label columns")
+    parser.add_argument("--model", default=PICKLE_MODEL_PATH,
+                        help="Saved model to start from (default %(default)s)")
+    parser.add_argument("--baseline", default=os.path.join(REPO_ROOT, "data", "final_balanced_dataset.csv"),
+                        help="Dataset to replay rows from (default %(default)s)")
+    parser.add_argument("--replay", type=int, default=20000,
+                        help="Baseline rows to mix in, split evenly across classes (0 to disable)")
+    parser.add_argument("--add-trees", type=int, default=100)
+    parser.add_argument("--drop-oldest", type=int, default=0,
+                        help="Remove this many of the oldest trees after growing")
+    parser.add_argument("--calibration-size", type=float, default=0.2,
+                        help="Share of the update rows held out to refit the sigmoid")
+    parser.add_argument("--eval-size", type=float, default=0.2,
+                        help="Share of the new batch held out from fitting and calibration "
+                             "to compare the old and updated models")
+    parser.add_argument("--promote", action="store_true",
+                        help="Also overwrite --model and its engine with the update")
+    add_budget_args(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    budget = budget_from_args(args)
+    start = time.perf_counter()
+
+    saved = joblib.load(args.model)
+    forest = _forest_of(saved["model"])
+    columns = saved["feature_columns"]
+    threshold = saved["threshold"]
+    trees_before = len(forest.estimators_)
+
+    rows = load_rows(args.batch, args.baseline, args.replay)
+    with budget.phase("features"):
+        X = FeatureCache(n_jobs=budget.cores).features(rows["domain"])[columns]
+    y = rows["label"].astype(int)
+
+    # Old and new model are compared only on new-batch rows neither has
+    # seen: replayed baseline rows were part of the old model's training
+    new = rows.index[~rows["replayed"]]
+    eval_idx = holdout_split(new, y[new], args.eval_size, "--eval-size of the new batch")[1]
+    X_eval, y_eval = X.loc[eval_idx], y.loc[eval_idx]
+    X, y = X.drop(eval_idx), y.drop(eval_idx)
+
+    X_fit, X_cal, y_fit, y_cal = holdout_split(X, y, args.calibration_size, "--calibration-size")
+
+    # Checked before anything is fitted or written
+    require_classes(y_fit, forest.classes_, "fit the new trees on")
+    require_classes(y_cal, forest.classes_, "calibrate on")
+
+    before = holdout_scores(saved["model"], X_eval, y_eval, threshold)
+
+    print(f"\nGrowing forest: {trees_before} + {args.add_trees} trees"
+          + (f", dropping the {args.drop_oldest} oldest" if args.drop_oldest else ""))
+    with budget.limit_threads(), budget.phase("update"):
+        forest.set_params(n_jobs=budget.cores)
+        forest = update_forest(forest, X_fit, y_fit, args.add_trees, args.drop_oldest)
+
+        # Refit the sigmoid on update rows the new trees did not train on. The
+        # older trees may have seen replayed rows, so this is slightly optimistic.
+        model = SingleForestCalibratedClassifier.from_prefit(forest, X_cal, y_cal)
+    after = holdout_scores(model, X_eval, y_eval, threshold)
+
+    version = time.strftime("%Y%m%d-%H%M%S")
+    pickle_path = versioned_path(args.model, version)
+    engine_path = versioned_path(engine_path_for(args.model), version)
+
+    joblib.dump({
+        "model": model,
+        "feature_columns": columns,
+        "threshold": threshold,
+        "version": version,
+        "parent": os.path.basename(args.model),
+    }, pickle_path)
+    save_engine(
+        engine_path, ForestEngine.from_model(model), threshold, columns,
+        training_data=[args.batch, args.baseline] if args.replay and args.baseline else args.batch,
+        metadata={"version": version, "parent": os.path.basename(args.model)}
+    )
+
+    print(f"\nHeld-out new-batch rows ({len(y_eval):,}):")
+    if "auc" in before:
+        print(f"  AUC: {before['auc']:.4f} -> {after['auc']:.4f}")
+    print(f"  Accuracy at threshold {threshold}: {before['accuracy']:.4f} -> {after['accuracy']:.4f}")
+    print(f"Trees: {trees_before} -> {len(forest.estimators_)}")
+    print(f"Saved {pickle_path}\nSaved {engine_path}")
+
+    if args.promote:
+        shutil.copyfile(pickle_path, args.model)
+        copy_artifact(engine_path, engine_path_for(args.model))
+        print(f"Promoted to {args.model}")
+
+    print(f"\nUpdate finished in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import os
+from collections import deque
+
+
+KEYWORDS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "keywords"
+)
+
+
+def load_keywords(name):
+    """Reads data/keywords/<name>.txt: one lowercase pattern per line, # comments."""
+
+    path = os.path.join(KEYWORDS_DIR, name + ".txt")
+    with open(path, "r", encoding="utf-8") as f:
+        words = [line.strip().lower() for line in f]
+
+    return list(dict.fromkeys(w for w in words if w and not w.startswith("#")))
+
+
+# ================================
+# Aho-Corasick Automaton
+# ================================
+
+class KeywordMatcher:
+    """Finds every occurrence of any of a set of patterns in one pass.
+
+    The automaton is compiled into a full transition table (failure links
+    already followed), so scanning costs one dict lookup per character no
+    matter how many patterns there are.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+
+        goto = [{}]
+        out = [[]]
+
+        for idx, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                state = nxt
+            out[state].append(idx)
+
+        # Breadth-first: each state's transitions are its own edges plus
+        # those of its failure state
+        fail = [0] * len(goto)
+        delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            delta[state] = dict(delta[fail[state]])
+
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+                delta[state][ch] = nxt
+                queue.append(nxt)
+
+        self._delta = delta
+        self._out = [tuple(o) for o in out]
+        self._lengths = [len(p) for p in self.patterns]
+
+    def find_all(self, text):
+        """List of (start, pattern_index) for every (overlapping) match."""
+
+        delta, out, lengths = self._delta, self._out, self._lengths
+        state = 0
+        hits = []
+
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            for idx in out[state]:
+                hits.append((i - lengths[idx] + 1, idx))
+
+        return hits
+
+    def matched(self, text):
+        """Set of patterns occurring in text."""
+        return {self.patterns[idx] for _, idx in self.find_all(text)}
@@ -0,0 +1,267 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+
+# ================================
+# Buckets
+# ================================
+
+# 1µs to 10s, three buckets per decade (1, 2.5, 5)
+LATENCY_BUCKETS = tuple(
+    round(m * 10.0 ** e, 9) for e in range(-6, 1) for m in (1.0, 2.5, 5.0)
+) + (10.0,)
+
+
+def _label_text(names, values, extra=""):
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ================================
+# Metric Types
+# ================================
+
+class Counter:
+    """Monotonic counts, one per combination of label values."""
+
+    type = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, n=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + n
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def reset(self):
+        with self._lock:
+            self._values = {}
+
+    def series(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [{"labels": dict(zip(self.labels, key)), "value": v} for key, v in items]
+
+    def prometheus(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = []
+        for key, v in items:
+            lines.append(f"{self.name}{_label_text(self.labels, key)} {_format_value(v)}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram, one per combination of label values.
+
+    observe() is a bisect and two additions under a lock, so it is cheap
+    enough to call several times per scored URL. Quantiles are estimated
+    from the buckets the way Prometheus' histogram_quantile() does it.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.bounds = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.bounds) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+
+    def _items(self):
+        with self._lock:
+            return sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+
+    def _quantile(self, q, counts):
+        count = sum(counts)
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(counts):
+            if n and seen + n >= rank:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - seen) / n
+            seen += n
+        return 0.0
+
+    def series(self):
+        out = []
+        for key, counts, total in self._items():
+            count = sum(counts)
+            out.append({
+                "labels": dict(zip(self.labels, key)),
+                "count": count,
+                "sum": total,
+                "mean": total / count if count else 0.0,
+                "p50": self._quantile(0.50, counts),
+                "p90": self._quantile(0.90, counts),
+                "p99": self._quantile(0.99, counts),
+            })
+        return out
+
+    def prometheus(self):
+        lines = []
+        for key, counts, total in self._items():
+            cumulative = 0
+            for bound, n in zip(self.bounds + (float("inf"),), counts):
+                cumulative += n
+                le = _label_text(self.labels, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _label_text(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+# ================================
+# Stage Timer
+# ================================
+
+class StageTimer:
+    """Times consecutive stages of one call.
+
+    Each lap(stage) records the time since the previous lap (or since the
+    timer was created) into `stages`; finish() records the whole call
+    into `total`. Label values given here are prepended to the stage name.
+    """
+
+    __slots__ = ("stages", "total", "label_values", "start", "last")
+
+    def __init__(self, stages, total, *label_values):
+        self.stages = stages
+        self.total = total
+        self.label_values = label_values
+        self.start = self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.stages.observe(now - self.last, *self.label_values, stage)
+        self.last = now
+
+    def finish(self):
+        self.total.observe(time.perf_counter() - self.start, *self.label_values)
+
+
+class _NullTimer:
+
+    __slots__ = ()
+
+    def lap(self, stage):
+        pass
+
+    def finish(self):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+# ================================
+# Registry
+# ================================
+
+class MetricsRegistry:
+    """A named set of counters and histograms with Prometheus and JSON export.
+
+    With enabled=False, timer() hands out a no-op timer and instrumented
+    code is expected to skip its counters, so the cost is one attribute
+    check per call.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._metrics = {}
+        self.started = time.time()
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name!r} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def timer(self, stages, total, *label_values):
+        if not self.enabled:
+            return _NULL_TIMER
+        return StageTimer(stages, total, *label_values)
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.reset()
+        self.started = time.time()
+
+    # ----- export -----
+
+    def snapshot(self):
+        """All metrics as plain data (histograms summarised as count, sum,
+        mean and estimated p50/p90/p99, in seconds)."""
+
+        return {
+            "timestamp": time.time(),
+            "since": self.started,
+            "enabled": self.enabled,
+            "metrics": {
+                name: {"type": m.type, "help": m.help, "series": m.series()}
+                for name, m in self._metrics.items()
+            },
+        }
+
+    def prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+
+        lines = []
+        for name, m in self._metrics.items():
+            lines.append(f"# HELP {name} {m.help}")
+            lines.append(f"# TYPE {name} {m.type}")
+            lines.extend(m.prometheus())
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, path):
+        """Writes snapshot() as JSON, or prometheus() if path ends in .prom.
+
+        The file is replaced atomically so readers never see a partial one.
+        """
+
+        text = self.prometheus() if path.endswith(".prom") else json.dumps(self.snapshot(), indent=2)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
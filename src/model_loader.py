@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+import warnings
+
+import joblib
+
+
+# ================================
+# Paths
+# ================================
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PICKLE_MODEL_PATH = os.path.join(REPO_ROOT, "models", "final_rf_model.pkl")
+ENGINE_MODEL_PATH = os.path.join(REPO_ROOT, "models", "final_rf_engine")
+
+MODEL_FORMATS = ("engine", "pickle")
+
+
+def default_model_path():
+    """THREAT_MODEL_PATH if set, else the artifact THREAT_MODEL_FORMAT names.
+
+    The exported ForestEngine artifact is the default: it loads in
+    milliseconds, is shared between processes and scores a single URL in
+    well under a millisecond. THREAT_MODEL_FORMAT=pickle serves the sklearn
+    pickle instead.
+    """
+
+    if os.environ.get("THREAT_MODEL_PATH"):
+        return os.environ["THREAT_MODEL_PATH"]
+
+    fmt = os.environ.get("THREAT_MODEL_FORMAT", "engine")
+    if fmt not in MODEL_FORMATS:
+        raise ValueError(f"THREAT_MODEL_FORMAT must be one of {MODEL_FORMATS}, not {fmt!r}")
+
+    return ENGINE_MODEL_PATH if fmt == "engine" else PICKLE_MODEL_PATH
+
+
+def batch_model_path():
+    """The artifact for large batches: the sklearn pickle when the default
+    engine artifact is served (sklearn scores a few hundred rows and up
+    faster), else the same artifact as default_model_path()."""
+
+    path = default_model_path()
+    if path == ENGINE_MODEL_PATH and not os.environ.get("THREAT_MODEL_PATH"):
+        return PICKLE_MODEL_PATH
+    return path
+
+
+def _rss_bytes():
+    """Current resident set size of this process, or None if unknown."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+# ================================
+# Lazy Model Loader
+# ================================
+
+class ModelLoader:
+    """Loads the saved model artifact on first use.
+
+    Both the joblib pickle and the exported ForestEngine artifact directory
+    are supported and expose the same model/threshold/feature_columns.
+    mmap_mode is passed to the loader so stored numpy arrays are
+    memory-mapped and shared between processes instead of copied; engine
+    artifacts are mapped read-only unless told otherwise.
+    Their feature columns are checked against `expected_columns`. After
+    loading, `stats` reports the load time and the change in resident
+    memory.
+    """
+
+    def __init__(self, path=None, mmap_mode=None, expected_columns=None):
+        self.path = path or default_model_path()
+        self.mmap_mode = mmap_mode
+        self.expected_columns = expected_columns
+        self.stats = {}
+        self._data = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    def load(self):
+        if self._data is not None:
+            return self._data
+
+        with self._lock:
+            if self._data is None:
+                if not os.path.exists(self.path):
+                    raise FileNotFoundError(
+                        f"No model artifact at {self.path}; train_model.py writes both the "
+                        f"pickle and the engine, forest_engine.py exports an existing pickle"
+                    )
+
+                rss_before = _rss_bytes()
+                start = time.perf_counter()
+
+                if os.path.isdir(self.path):
+                    from forest_engine import load_engine
+                    data = load_engine(self.path, mmap_mode=self.mmap_mode or "r",
+                                       expected_columns=self.expected_columns)
+                    self._check_feature_set(data["manifest"])
+                else:
+                    data = joblib.load(self.path, mmap_mode=self.mmap_mode)
+
+                load_seconds = time.perf_counter() - start
+                rss_after = _rss_bytes()
+
+                self.stats = {
+                    "path": self.path,
+                    **self._identity(data),
+                    "mmap_mode": self.mmap_mode or ("r" if "manifest" in data else None),
+                    "load_seconds": load_seconds,
+                    "rss_bytes": rss_after,
+                    "rss_delta_bytes": (
+                        rss_after - rss_before
+                        if rss_before is not None and rss_after is not None
+                        else None
+                    ),
+                }
+                self._data = data
+
+        return self._data
+
+    def _identity(self, data):
+        """Version and size of the loaded artifact.
+
+        Engine artifacts are identified by their manifest, which holds the
+        checksum of every array; other files by mtime and size.
+        """
+
+        if "manifest" in data:
+            from forest_engine import MANIFEST_NAME, artifact_bytes, file_sha256
+            return {
+                "version": file_sha256(os.path.join(self.path, MANIFEST_NAME))[:16],
+                "file_bytes": artifact_bytes(self.path),
+            }
+
+        stat = os.stat(self.path)
+        return {"version": f"{stat.st_mtime_ns:x}-{stat.st_size:x}", "file_bytes": stat.st_size}
+
+    @staticmethod
+    def _check_feature_set(manifest):
+        from features import feature_set_version
+
+        if manifest["feature_set_version"] != feature_set_version():
+            warnings.warn(
+                f"Model was trained with feature set {manifest['feature_set_version']}, "
+                f"this code extracts {feature_set_version()}; scores may be off",
+                stacklevel=3
+            )
+
+    def warm(self):
+        """Loads the model now and returns the load stats."""
+        self.load()
+        return self.stats
+
+    def unload(self):
+        with self._lock:
+            self._data = None
+            self.stats = {}
+
+    @property
+    def version(self):
+        """Identifies the loaded artifact: the first 16 hex digits of the
+        manifest's sha256 for engine artifacts, file mtime and size for
+        pickles."""
+        self.load()
+        return self.stats["version"]
+
+    @property
+    def model(self):
+        return self.load()["model"]
+
+    @property
+    def threshold(self):
+        return self.load()["threshold"]
+
+    @property
+    def feature_columns(self):
+        return self.load().get("feature_columns")
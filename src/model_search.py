@@ -0,0 +1,228 @@
+import time
+
+import pandas as pd
+from scipy.stats import randint
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (
+    GridSearchCV,
+    HalvingGridSearchCV,
+    ParameterGrid,
+    ParameterSampler,
+    cross_validate,
+)
+
+
+# =====================================
+# Search Spaces
+# =====================================
+
+PARAM_GRID = {
+    "n_estimators": [400, 600, 800],
+    "max_depth": [12, 16, None],
+    "min_samples_split": [2, 4, 6],
+    "min_samples_leaf": [1, 2, 3],
+    "max_features": ["sqrt", "log2"]
+}
+
+RANDOM_SPACE = {
+    "n_estimators": randint(100, 801),
+    "max_depth": [8, 12, 16, 24, None],
+    "min_samples_split": randint(2, 7),
+    "min_samples_leaf": randint(1, 4),
+    "max_features": ["sqrt", "log2"]
+}
+
+SEARCH_MODES = ["grid", "halving", "random"]
+
+
+def base_forest(n_jobs=-1):
+    return RandomForestClassifier(
+        class_weight="balanced",
+        n_jobs=n_jobs,
+        random_state=42
+    )
+
+
+# =====================================
+# Candidate Log
+# =====================================
+
+def _candidates_from_cv_results(cv_results, resource=None):
+    """One record per evaluated configuration: params, AUC and cost.
+
+    `seconds` is the mean fit + score time of one CV fold. For successive
+    halving the resource value used in each round is folded into the
+    params, so cheap early-round configurations are real candidates too.
+    """
+
+    candidates = []
+    for i, params in enumerate(cv_results["params"]):
+        params = dict(params)
+        if resource is not None:
+            params[resource] = int(cv_results["n_resources"][i])
+        candidates.append({
+            "params": params,
+            "auc": float(cv_results["mean_test_score"][i]),
+            "seconds": float(cv_results["mean_fit_time"][i] + cv_results["mean_score_time"][i]),
+        })
+    return candidates
+
+
+def log_candidates(candidates, path=None):
+    table = pd.DataFrame([
+        {"auc": c["auc"], "seconds": c["seconds"], **c["params"]} for c in candidates
+    ]).sort_values("auc", ascending=False)
+
+    print("\nCandidates (AUC vs. seconds per fold):")
+    print(table.to_string(index=False))
+
+    if path:
+        table.to_csv(path, index=False)
+        print(f"Search log written to {path}")
+
+
+def select_candidate(candidates, target_auc=None):
+    """Cheapest candidate reaching target_auc, else the best AUC."""
+
+    if target_auc is not None:
+        reaching = [c for c in candidates if c["auc"] >= target_auc]
+        if reaching:
+            return min(reaching, key=lambda c: c["seconds"])
+        print(f"\nNo candidate reached target AUC {target_auc}; using the best one.")
+
+    return max(candidates, key=lambda c: c["auc"])
+
+
+# =====================================
+# Search Strategies
+# =====================================
+
+def grid_search(X, y, cv=3, n_jobs=-1, forest_jobs=-1):
+    """The original exhaustive 162-combination grid."""
+
+    search = GridSearchCV(
+        estimator=base_forest(forest_jobs),
+        param_grid=PARAM_GRID,
+        cv=cv,
+        scoring="roc_auc",
+        verbose=2,
+        n_jobs=n_jobs,
+        refit=False
+    )
+    search.fit(X, y)
+    return _candidates_from_cv_results(search.cv_results_)
+
+
+def halving_search(X, y, cv=3, n_jobs=-1, factor=3, forest_jobs=-1):
+    """Successive halving with the tree count as the budget.
+
+    Every grid point starts with a few dozen trees; only the best third
+    of each round moves on with three times as many, up to 800.
+    """
+
+    grid = {k: v for k, v in PARAM_GRID.items() if k != "n_estimators"}
+
+    search = HalvingGridSearchCV(
+        estimator=base_forest(forest_jobs),
+        param_grid=grid,
+        resource="n_estimators",
+        max_resources=max(PARAM_GRID["n_estimators"]),
+        min_resources="exhaust",
+        factor=factor,
+        cv=cv,
+        scoring="roc_auc",
+        verbose=1,
+        n_jobs=n_jobs,
+        refit=False,
+        random_state=42
+    )
+    search.fit(X, y)
+    return _candidates_from_cv_results(search.cv_results_, resource="n_estimators")
+
+
+def random_search(X, y, time_budget, cv=3, n_jobs=-1, max_candidates=200, seed=42, forest_jobs=-1):
+    """Randomized search that stops before exceeding a wall-clock budget.
+
+    A candidate is only started if, at the seconds-per-tree rate seen so
+    far, it is expected to finish within the remaining budget.
+    """
+
+    start = time.perf_counter()
+    candidates = []
+    seconds_per_tree = None
+
+    for params in ParameterSampler(RANDOM_SPACE, n_iter=max_candidates, random_state=seed):
+        params = {k: (int(v) if hasattr(v, "item") else v) for k, v in params.items()}
+        remaining = time_budget - (time.perf_counter() - start)
+
+        if remaining <= 0:
+            break
+        if seconds_per_tree is not None and seconds_per_tree * params["n_estimators"] > remaining:
+            continue
+
+        t0 = time.perf_counter()
+        scores = cross_validate(
+            base_forest(forest_jobs).set_params(**params), X, y,
+            cv=cv, scoring="roc_auc", n_jobs=n_jobs
+        )
+        elapsed = time.perf_counter() - t0
+
+        rate = elapsed / params["n_estimators"]
+        seconds_per_tree = rate if seconds_per_tree is None else max(seconds_per_tree, rate)
+
+        candidate = {
+            "params": params,
+            "auc": float(scores["test_score"].mean()),
+            "seconds": float((scores["fit_time"] + scores["score_time"]).mean()),
+        }
+        candidates.append(candidate)
+        print(
+            f"[{len(candidates):>3}] AUC {candidate['auc']:.4f} "
+            f"| {candidate['seconds']:.1f}s/fold | {elapsed:.1f}s total | {params}"
+        )
+
+    if not candidates:
+        raise RuntimeError(f"No candidate fit within the {time_budget}s budget")
+
+    return candidates
+
+
+def search_tasks(mode, cv=3):
+    """Candidate fits a search mode can run side by side (its first round)."""
+
+    if mode == "random":
+        return cv
+    grid = ParameterGrid(PARAM_GRID)
+    if mode == "halving":
+        return len(grid) // len(PARAM_GRID["n_estimators"]) * cv
+    return len(grid) * cv
+
+
+def run_search(mode, X, y, time_budget=None, target_auc=None, log_path=None, n_jobs=-1,
+               forest_jobs=-1):
+    """Runs a search mode and returns (selected params, all candidates).
+
+    n_jobs candidate fits run at once, each forest on forest_jobs cores.
+    """
+
+    print(f"\nRunning {mode} search...")
+    start = time.perf_counter()
+
+    if mode == "grid":
+        candidates = grid_search(X, y, n_jobs=n_jobs, forest_jobs=forest_jobs)
+    elif mode == "halving":
+        candidates = halving_search(X, y, n_jobs=n_jobs, forest_jobs=forest_jobs)
+    elif mode == "random":
+        candidates = random_search(X, y, time_budget or 1800, n_jobs=n_jobs, forest_jobs=forest_jobs)
+    else:
+        raise ValueError(f"Unknown search mode: {mode}")
+
+    print(f"\nSearch finished in {time.perf_counter() - start:.1f}s "
+          f"({len(candidates)} candidates)")
+
+    log_candidates(candidates, log_path)
+    selected = select_candidate(candidates, target_auc)
+
+    return selected["params"], candidates
@@ -0,0 +1,335 @@
+import argparse
+import ast
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from model_loader import REPO_ROOT
+
+
+STATE_PATH = os.path.join(REPO_ROOT, ".pipeline", "state.json")
+
+
+# ================================
+# Stages
+# ================================
+
+def local_imports(script):
+    """Repo-relative paths of the src/ modules script imports, directly or
+    through other src/ modules, including imports inside functions."""
+
+    found = []
+    pending = [script]
+    while pending:
+        path = pending.pop()
+        try:
+            with open(os.path.join(REPO_ROOT, path)) as f:
+                tree = ast.parse(f.read(), path)
+        except OSError:
+            continue
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                module = f"src/{name.split('.')[0]}.py"
+                if module != script and module not in found and os.path.exists(os.path.join(REPO_ROOT, module)):
+                    found.append(module)
+                    pending.append(module)
+
+    return sorted(found)
+
+
+class Stage:
+    """A script with the files it reads and the files it writes.
+
+    Paths are relative to the repository root, which is also the working
+    directory the script runs in. The src/ modules the script imports
+    (see local_imports) are inputs too.
+    """
+
+    def __init__(self, name, script, inputs, outputs, args=()):
+        self.name = name
+        self.script = script
+        self.inputs = [script] + local_imports(script) + list(inputs)
+        self.outputs = list(outputs)
+        self.args = list(args)
+
+    def command(self):
+        return [sys.executable, self.script] + self.args
+
+
+# Read by keyword_matcher when features are extracted
+KEYWORD_LISTS = [
+    "data/keywords/suspicious_words.txt",
+    "data/keywords/brands.txt",
+]
+
+
+def default_stages(train_args=()):
+    return [
+        Stage(
+            "convert", "src/convert_multiclass_to_binary_domain.py",
+            inputs=["data/Final_Raw_Malicious_Url_Dataset.csv"],
+            outputs=["data/domain_binary_dataset.csv"],
+        ),
+        Stage(
+            "benign", "src/build_benign_dataset.py",
+            inputs=["data/top-1m.csv", "data/majestic_million.csv"],
+            outputs=["data/benign_domains.csv"],
+        ),
+        Stage(
+            "malicious", "src/build_malicious_dataset.py",
+            inputs=["data/feed.txt"],
+            outputs=["data/malicious_domains.csv"],
+        ),
+        Stage(
+            "balanced", "src/build_balanced_dataset.py",
+            inputs=["data/benign_domains.csv", "data/domain_binary_dataset.csv"],
+            outputs=["data/final_balanced_dataset.csv"],
+        ),
+        Stage(
+            "train", "src/train_model.py",
+            inputs=["data/final_balanced_dataset.csv"] + KEYWORD_LISTS,
+            outputs=["models/final_rf_model.pkl", "models/final_rf_engine/manifest.json"],
+            args=train_args,
+        ),
+    ]
+
+
+def dependencies(stages):
+    """Stage name -> names of the stages producing any of its inputs."""
+
+    producer = {out: s.name for s in stages for out in s.outputs}
+    return {
+        s.name: sorted({producer[i] for i in s.inputs if i in producer} - {s.name})
+        for s in stages
+    }
+
+
+# ================================
+# Fingerprints
+# ================================
+
+class FileHashes:
+    """sha256 of file contents, reused while a file's size and mtime are unchanged."""
+
+    def __init__(self, known=None):
+        self.known = dict(known or {})
+
+    def __call__(self, rel_path):
+        path = os.path.join(REPO_ROOT, rel_path)
+        if not os.path.exists(path):
+            return None
+
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        cached = self.known.get(rel_path)
+        if cached and cached["stamp"] == stamp:
+            return cached["sha256"]
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+
+        self.known[rel_path] = {"stamp": stamp, "sha256": h.hexdigest()}
+        return h.hexdigest()
+
+
+def fingerprint(stage, file_hash):
+    spec = {
+        "command": [os.path.basename(stage.script)] + stage.args,
+        "inputs": {path: file_hash(path) for path in stage.inputs},
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+def load_state(path=STATE_PATH):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {"stages": {}, "files": {}}
+
+
+def save_state(state, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+# ================================
+# Runner
+# ================================
+
+def plan(stage, state, file_hash, force=False):
+    """("run" | "skip" | "missing", reason) for one stage whose upstream
+    stages are already up to date."""
+
+    missing = [p for p in stage.inputs if file_hash(p) is None]
+    outputs_present = all(file_hash(p) is not None for p in stage.outputs)
+
+    if missing:
+        if outputs_present:
+            return "skip", f"inputs unavailable ({', '.join(missing)}); keeping existing outputs"
+        return "missing", f"missing inputs: {', '.join(missing)}"
+
+    if force:
+        return "run", "forced"
+
+    record = state["stages"].get(stage.name)
+    if record is None:
+        return "run", "never run"
+    if record["fingerprint"] != fingerprint(stage, file_hash):
+        return "run", "inputs changed"
+    if any(record["outputs"].get(p) != file_hash(p) for p in stage.outputs):
+        return "run", "outputs changed or missing"
+    return "skip", "up to date"
+
+
+def run_stage(stage, log_dir):
+    os.makedirs(log_dir, exist_ok=True)
+    log_path = os.path.join(log_dir, f"{stage.name}.log")
+
+    start = time.perf_counter()
+    with open(log_path, "w") as log:
+        result = subprocess.run(stage.command(), cwd=REPO_ROOT, stdout=log, stderr=subprocess.STDOUT)
+    return result.returncode, time.perf_counter() - start, log_path
+
+
+def select_stages(stages, deps, targets):
+    """The target stages plus everything upstream of them."""
+
+    if not targets:
+        return stages
+
+    wanted, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(deps[name])
+    return [s for s in stages if s.name in wanted]
+
+
+def run_pipeline(stages, targets=(), force=(), jobs=2, dry_run=False):
+    """Runs out-of-date stages in dependency order, independent ones in parallel.
+
+    Returns True if every selected stage is up to date afterwards.
+    """
+
+    deps = dependencies(stages)
+    stages = select_stages(stages, deps, targets)
+    by_name = {s.name: s for s in stages}
+
+    state = load_state()
+    file_hash = FileHashes(state.get("files"))
+    log_dir = os.path.join(os.path.dirname(STATE_PATH), "logs")
+
+    done, failed, would_run = set(), set(), set()
+    pending = list(by_name)
+    running = {}
+    ok = True
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            for name in list(pending):
+                upstream = [d for d in deps[name] if d in by_name]
+                if any(d in failed for d in upstream):
+                    pending.remove(name)
+                    failed.add(name)
+                    print(f"[{name}] skipped: upstream failed")
+                    continue
+                if not all(d in done for d in upstream):
+                    continue
+
+                pending.remove(name)
+                stage = by_name[name]
+                action, reason = plan(stage, state, file_hash, force=name in force)
+
+                # A dry run cannot see the outputs upstream stages would write
+                if dry_run and action == "skip" and any(d in would_run for d in upstream):
+                    action, reason = "run", "upstream would run"
+
+                if action == "skip":
+                    print(f"[{name}] skip ({reason})")
+                    done.add(name)
+                elif action == "missing":
+                    print(f"[{name}] cannot run: {reason}")
+                    failed.add(name)
+                elif dry_run:
+                    print(f"[{name}] would run ({reason})")
+                    would_run.add(name)
+                    done.add(name)
+                else:
+                    print(f"[{name}] running ({reason})")
+                    running[pool.submit(run_stage, stage, log_dir)] = stage
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = running.pop(future)
+                code, seconds, log_path = future.result()
+
+                if code == 0:
+                    state["stages"][stage.name] = {
+                        "fingerprint": fingerprint(stage, file_hash),
+                        "outputs": {p: file_hash(p) for p in stage.outputs},
+                        "seconds": round(seconds, 2),
+                        "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    }
+                    state["files"] = file_hash.known
+                    save_state(state)
+                    done.add(stage.name)
+                    print(f"[{stage.name}] done in {seconds:.1f}s")
+                else:
+                    failed.add(stage.name)
+                    ok = False
+                    print(f"[{stage.name}] FAILED (exit {code}), see {log_path}")
+
+    if failed:
+        ok = False
+    if not dry_run:
+        state["files"] = file_hash.known
+        save_state(state)
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild datasets and the model, skipping up-to-date stages.")
+    parser.add_argument("targets", nargs="*",
+                        help="Stages to bring up to date, with their upstream stages (default: all)")
+    parser.add_argument("--force", action="append", default=[], metavar="STAGE",
+                        help="Rerun this stage even if it is up to date (repeatable)")
+    parser.add_argument("-j", "--jobs", type=int, default=2,
+                        help="Independent stages to run at once (default 2)")
+    parser.add_argument("-n", "--dry-run", action="store_true")
+    parser.add_argument("--train-args", default="",
+                        help="Extra arguments for train_model.py, e.g. \"--search random\"")
+    args = parser.parse_args(argv)
+
+    stages = default_stages(shlex.split(args.train_args))
+    names = {s.name for s in stages}
+    unknown = (set(args.targets) | set(args.force)) - names
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))} (known: {', '.join(sorted(names))})")
+
+    ok = run_pipeline(stages, args.targets, set(args.force), args.jobs, args.dry_run)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+import argparse
+import gc
+import multiprocessing as mp
+import os
+import queue
+import time
+from collections import deque
+
+import threat_engine
+from bulk_scan import iter_chunks, iter_csv_column, iter_lines, score_chunk, single_threaded
+
+
+# ================================
+# Process Memory
+# ================================
+
+def process_memory(pid):
+    """RSS, PSS, USS and shared bytes of a process from /proc/<pid>/smaps_rollup.
+
+    USS (private pages) is what the process costs on its own; PSS splits
+    each shared page between the processes mapping it. Returns None where
+    smaps_rollup is not available.
+    """
+
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    except OSError:
+        return None
+
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+    }
+
+
+# ================================
+# Worker
+# ================================
+
+def _worker(tasks, results, warm):
+    # Forked workers inherit the parent's loaded model; spawned ones load their own
+    if warm:
+        threat_engine.warm_up(batch_model=True)
+    single_threaded(threat_engine.batch_loader.model)
+
+    for job_id, urls in iter(tasks.get, None):
+        try:
+            rows = score_chunk(urls)
+        except Exception as e:
+            rows = e
+        results.put((job_id, os.getpid(), rows))
+
+
+# ================================
+# Pre-fork Pool
+# ================================
+
+class PreforkPool:
+    """Scoring workers forked from a parent that has already loaded the model.
+
+    The parent loads the model, imports and builds every lookup structure,
+    then gc.freeze()s its heap so the collector in the workers never writes
+    to the inherited objects. Forked workers share all those pages
+    copy-on-write, so each extra worker only costs the memory it touches
+    while scoring. start_method="spawn" starts independent workers that
+    load their own copy instead, for comparison.
+
+    imap() hands chunks out through one shared queue (idle workers take the
+    next chunk) and yields results in input order, with at most
+    2 * workers chunks in flight.
+    """
+
+    def __init__(self, workers=None, start_method="fork"):
+        self.workers = workers or os.cpu_count() or 1
+        self.start_method = start_method
+        self.processes = []
+        self.chunks_by_pid = {}
+
+    def start(self):
+        ctx = mp.get_context(self.start_method)
+        forked = self.start_method == "fork"
+
+        if forked:
+            self.warm_stats = threat_engine.warm_up(batch_model=True)
+            gc.collect()
+            gc.freeze()
+
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self.processes = [
+            ctx.Process(target=_worker, args=(self._tasks, self._results, not forked), daemon=True)
+            for _ in range(self.workers)
+        ]
+        for p in self.processes:
+            p.start()
+
+        if forked:
+            gc.unfreeze()
+        return self
+
+    def close(self):
+        for _ in self.processes:
+            self._tasks.put(None)
+        for p in self.processes:
+            p.join(timeout=10)
+            if p.is_alive():
+                p.terminate()
+        self.processes = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def imap(self, chunks, max_in_flight=None):
+        max_in_flight = max_in_flight or 2 * self.workers
+        done = {}
+        pending = deque()
+        next_id = 0
+
+        def collect():
+            while True:
+                try:
+                    job_id, pid, rows = self._results.get(timeout=1.0)
+                    break
+                except queue.Empty:
+                    dead = [p.pid for p in self.processes if not p.is_alive()]
+                    if dead:
+                        raise RuntimeError(f"Scoring worker(s) {dead} exited unexpectedly")
+            if isinstance(rows, Exception):
+                raise rows
+            self.chunks_by_pid[pid] = self.chunks_by_pid.get(pid, 0) + 1
+            done[job_id] = rows
+
+        for chunk in chunks:
+            self._tasks.put((next_id, chunk))
+            pending.append(next_id)
+            next_id += 1
+
+            while len(pending) >= max_in_flight:
+                while pending[0] not in done:
+                    collect()
+                yield done.pop(pending.popleft())
+
+        while pending:
+            while pending[0] not in done:
+                collect()
+            yield done.pop(pending.popleft())
+
+    def memory(self):
+        """process_memory() of the parent and of every live worker."""
+
+        return {
+            "parent": process_memory(os.getpid()),
+            "workers": [process_memory(p.pid) for p in self.processes if p.is_alive()],
+        }
+
+
+# ================================
+# Scaling Benchmark
+# ================================
+
+def _mib(n):
+    return n / 2**20
+
+
+def bench(urls, worker_counts, chunk_size=1000, start_method="fork"):
+    """Throughput and per-worker memory for each worker count."""
+
+    rows = []
+    baseline = None
+
+    for n in worker_counts:
+        with PreforkPool(n, start_method) as pool:
+            # Untimed pass so every worker has faulted in the pages it uses
+            warm = iter_chunks(iter(urls[:n * 50]), 50)
+            for _ in pool.imap(warm):
+                pass
+            pool.chunks_by_pid = {}
+
+            start = time.perf_counter()
+            scored = sum(len(r) for r in pool.imap(iter_chunks(iter(urls), chunk_size)))
+            elapsed = time.perf_counter() - start
+
+            mem = pool.memory()
+            chunks = sorted(pool.chunks_by_pid.values())
+
+        workers = [m for m in mem["workers"] if m]
+        rate = scored / elapsed
+        baseline = baseline or rate / n
+        rows.append({
+            "workers": n,
+            "urls_per_sec": rate,
+            "efficiency": rate / (baseline * n),
+            "chunks_per_worker": f"{chunks[0]}-{chunks[-1]}" if chunks else "-",
+            "worker_uss_mib": _mib(sum(m["uss"] for m in workers) / len(workers)) if workers else None,
+            "worker_pss_mib": _mib(sum(m["pss"] for m in workers) / len(workers)) if workers else None,
+            "total_pss_mib": _mib(sum(m["pss"] for m in workers + [mem["parent"]] if m)),
+        })
+
+    return rows
+
+
+def print_bench(rows, start_method):
+    print(f"\n--- {start_method} workers ---")
+    print(f"{'workers':>7} {'URLs/s':>10} {'efficiency':>10} {'chunks':>9} "
+          f"{'USS/worker':>11} {'PSS/worker':>11} {'total PSS':>10}")
+    for r in rows:
+        uss = f"{r['worker_uss_mib']:.1f}M" if r["worker_uss_mib"] is not None else "-"
+        pss = f"{r['worker_pss_mib']:.1f}M" if r["worker_pss_mib"] is not None else "-"
+        print(f"{r['workers']:>7} {r['urls_per_sec']:>10,.0f} {r['efficiency']:>10.0%} "
+              f"{r['chunks_per_worker']:>9} {uss:>11} {pss:>11} {r['total_pss_mib']:>9.1f}M")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pre-forked scoring workers.")
+    parser.add_argument("--input", default=None,
+                        help="URLs to score: text file, or CSV with --column (default: sample of data/*.csv)")
+    parser.add_argument("--column", default=None)
+    parser.add_argument("--urls", type=int, default=20000, help="URLs per run")
+    parser.add_argument("--workers", default=None,
+                        help="Comma-separated worker counts (default: 1, 2, 4, ... up to the core count)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--compare-spawn", action="store_true",
+                        help="Also run independently started workers that each load the model")
+    args = parser.parse_args(argv)
+
+    # Measure scoring, not verdict cache hits (spawned workers read the env)
+    os.environ["THREAT_CACHE_SIZE"] = "0"
+    from verdict_cache import VerdictCache
+    threat_engine.verdict_cache = VerdictCache(maxsize=0)
+
+    if args.input:
+        urls = iter_csv_column(args.input, args.column, 50000) if args.column else iter_lines(args.input)
+        urls = [u for _, u in zip(range(args.urls), urls)]
+    else:
+        from benchmark import load_corpus
+        urls = load_corpus(args.urls)
+
+    if args.workers:
+        counts = [int(n) for n in args.workers.split(",")]
+    else:
+        cores = os.cpu_count() or 1
+        counts = sorted({min(2 ** i, cores) for i in range(cores.bit_length() + 1)})
+
+    print(f"{len(urls):,} URLs, chunks of {args.chunk_size}, {os.cpu_count()} cores")
+
+    print_bench(bench(urls, counts, args.chunk_size, "fork"), "fork")
+    if args.compare_spawn:
+        print_bench(bench(urls, counts, args.chunk_size, "spawn"), "spawn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from threadpoolctl import threadpool_limits
+
+
+# ================================
+# Host Resources
+# ================================
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def available_memory_bytes():
+    """MemAvailable from /proc/meminfo, or None if unknown."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def _process_tree_cpu():
+    """{pid: CPU seconds} for this process and all its live descendants.
+
+    Read from /proc, so worker pools that outlive a phase (joblib's loky
+    executor) are counted too. Empty where /proc is not available.
+    """
+
+    stats = {}
+    try:
+        pids = [p for p in os.listdir("/proc") if p.isdigit()]
+    except OSError:
+        return {}
+
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        # fields[1] is the parent pid; utime and stime are fields 14/15 of
+        # the full line, 11/12 after the command name
+        stats[int(pid)] = (int(fields[1]), (int(fields[11]) + int(fields[12])) / _CLK_TCK)
+
+    root = os.getpid()
+    children = {}
+    for pid, (ppid, _) in stats.items():
+        children.setdefault(ppid, []).append(pid)
+
+    tree, todo = {}, [root]
+    while todo:
+        pid = todo.pop()
+        if pid in stats:
+            tree[pid] = stats[pid][1]
+            todo.extend(children.get(pid, ()))
+    return tree
+
+
+class _CpuMeter:
+    """CPU seconds used by the process tree between start() and stop().
+
+    A background thread samples the tree every `interval` seconds and
+    keeps the last value seen for each pid, so workers that exit during
+    the phase still count (up to their last sample).
+    """
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self._stop = threading.Event()
+
+    def _sample(self):
+        for pid, cpu in _process_tree_cpu().items():
+            if cpu > self.seen.get(pid, 0.0):
+                self.seen[pid] = cpu
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self.baseline = _process_tree_cpu()
+        self.seen = dict(self.baseline)
+        self._times = os.times()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+        if not self.baseline:
+            end = os.times()
+            return sum(end[:4]) - sum(self._times[:4])
+
+        return sum(cpu - self.baseline.get(pid, 0.0) for pid, cpu in self.seen.items())
+
+
+# ================================
+# Budget
+# ================================
+
+class ResourceBudget:
+    """A core and memory budget shared out between nested parallel levels.
+
+    Searches run `outer` candidate fits at once, each forest using `inner`
+    cores, with outer * inner <= cores, so joblib pools never multiply
+    into more threads than the budget. Native BLAS/OpenMP pools in this
+    process are capped by limit_threads(). Every phase() logs wall time,
+    CPU time and the share of the budget actually used.
+    """
+
+    def __init__(self, cores=None, memory_bytes=None):
+        cores = cores or int(os.environ.get("THREAT_CORES", 0)) or available_cores()
+        self.cores = max(1, min(cores, available_cores()))
+
+        if memory_bytes is None and os.environ.get("THREAT_MEMORY_GB"):
+            memory_bytes = float(os.environ["THREAT_MEMORY_GB"]) * 2**30
+        self.memory_bytes = memory_bytes or available_memory_bytes()
+
+        self.phases = []
+
+    def split(self, n_tasks, task_memory_bytes=None):
+        """(outer, inner) workers for n_tasks independent tasks."""
+
+        outer = max(1, min(n_tasks, self.cores))
+        if task_memory_bytes and self.memory_bytes:
+            outer = max(1, min(outer, int(self.memory_bytes // task_memory_bytes)))
+        return outer, max(1, self.cores // outer)
+
+    def limit_threads(self, threads=None):
+        """Context manager capping BLAS/OpenMP threads in this process."""
+        return threadpool_limits(limits=threads or self.cores)
+
+    @contextmanager
+    def phase(self, name):
+        meter = _CpuMeter()
+        start = time.perf_counter()
+        meter.start()
+        try:
+            yield
+        finally:
+            cpu = meter.stop()
+            wall = time.perf_counter() - start
+            used = cpu / wall if wall > 0 else 0.0
+            self.phases.append({"phase": name, "wall_s": wall, "cpu_s": cpu, "cores_used": used})
+            print(f"[resources] {name}: {wall:.1f}s wall, {cpu:.1f}s CPU, "
+                  f"{used:.1f} of {self.cores} cores ({used / self.cores:.0%})")
+
+    def describe(self):
+        memory = f"{self.memory_bytes / 2**30:.1f} GiB" if self.memory_bytes else "unknown"
+        return f"{self.cores} cores, {memory} memory"
+
+    def summary(self):
+        print("\n--- Resource Usage ---")
+        for p in self.phases:
+            print(f"{p['phase']:<20} {p['wall_s']:>8.1f}s wall {p['cpu_s']:>9.1f}s CPU "
+                  f"{p['cores_used'] / self.cores:>6.0%} of {self.cores} cores")
+
+
+def forest_fit_bytes(n_samples, n_features, n_estimators, max_depth=None):
+    """Rough peak memory of fitting one forest: a float32 copy of X, the
+    sample weights and up to one node per sample per tree."""
+
+    nodes = 2 * n_samples if max_depth is None else min(2 * n_samples, 2 ** (max_depth + 1))
+    return n_samples * (n_features * 4 + 16) + n_estimators * nodes * 80
+
+
+def add_budget_args(parser):
+    parser.add_argument("--cores", type=int, default=None,
+                        help="Cores to use (default: $THREAT_CORES or all available)")
+    parser.add_argument("--memory-gb", type=float, default=None,
+                        help="Memory budget (default: $THREAT_MEMORY_GB or MemAvailable)")
+
+
+def budget_from_args(args):
+    memory = args.memory_gb * 2**30 if args.memory_gb else None
+    budget = ResourceBudget(args.cores, memory)
+    print(f"Resource budget: {budget.describe()}")
+    return budget
@@ -0,0 +1,228 @@
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import tornado.ioloop
+import tornado.web
+
+import threat_engine
+
+
+# ================================
+# Micro-Batching
+# ================================
+
+class MicroBatcher:
+    """Coalesces concurrent scoring requests into one analyze_urls call.
+
+    Requests are queued until either max_batch URLs are waiting or the
+    oldest has waited max_wait_ms, then scored together on a single
+    worker thread so the event loop never blocks. While a batch is being
+    scored new requests keep queueing, so batches grow with load.
+    """
+
+    def __init__(self, max_batch=256, max_wait_ms=2.0):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scorer")
+        self._pending = []
+        self._pending_urls = 0
+        self._timer = None
+        self.batches = 0
+        self.urls_scored = 0
+        self.busy_seconds = 0.0
+
+    async def score(self, urls):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        self._pending.append((urls, future))
+        self._pending_urls += len(urls)
+
+        if self._pending_urls >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._pending:
+            return
+
+        batch, self._pending, self._pending_urls = self._pending, [], 0
+        asyncio.get_running_loop().create_task(self._run(batch))
+
+    def _score_sync(self, urls):
+        start = time.perf_counter()
+        results = threat_engine.analyze_urls(urls)
+        self.busy_seconds += time.perf_counter() - start
+        return results
+
+    async def _run(self, batch):
+        urls = [url for request_urls, _ in batch for url in request_urls]
+        loop = asyncio.get_running_loop()
+
+        try:
+            results = await loop.run_in_executor(self.executor, self._score_sync, urls)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.urls_scored += len(urls)
+
+        offset = 0
+        for request_urls, future in batch:
+            if not future.done():
+                future.set_result(results[offset:offset + len(request_urls)])
+            offset += len(request_urls)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "urls_scored": self.urls_scored,
+            "avg_batch_size": self.urls_scored / self.batches if self.batches else 0.0,
+            "busy_seconds": self.busy_seconds,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
+
+
+# ================================
+# HTTP Handlers
+# ================================
+
+class BaseHandler(tornado.web.RequestHandler):
+
+    def initialize(self, batcher):
+        self.batcher = batcher
+
+    def json_body(self):
+        try:
+            body = json.loads(self.request.body or b"{}")
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="Body must be JSON")
+        if not isinstance(body, dict):
+            raise tornado.web.HTTPError(400, reason="Body must be a JSON object")
+        return body
+
+    def write_error(self, status_code, **kwargs):
+        self.finish({"error": self._reason})
+
+
+class ScoreHandler(BaseHandler):
+    """GET /score?url=...  or  POST /score {"url": "..."}"""
+
+    async def get(self):
+        await self._score(self.get_argument("url"))
+
+    async def post(self):
+        url = self.json_body().get("url")
+        if not isinstance(url, str):
+            raise tornado.web.HTTPError(400, reason="Expected {\"url\": \"...\"}")
+        await self._score(url)
+
+    async def _score(self, url):
+        results = await self.batcher.score([url])
+        self.write(results[0])
+
+
+class BatchScoreHandler(BaseHandler):
+    """POST /score/batch {"urls": ["...", ...]}"""
+
+    async def post(self):
+        urls = self.json_body().get("urls")
+        if not isinstance(urls, list) or not all(isinstance(u, str) for u in urls):
+            raise tornado.web.HTTPError(400, reason="Expected {\"urls\": [\"...\", ...]}")
+        results = await self.batcher.score(urls) if urls else []
+        self.write({"results": results})
+
+
+class HealthHandler(BaseHandler):
+
+    def get(self):
+        self.write({"status": "ok", "model_loaded": threat_engine.loader.loaded})
+
+
+class StatsHandler(BaseHandler):
+
+    def get(self):
+        self.write({
+            "batcher": self.batcher.stats(),
+            "cache": threat_engine.cache_stats(),
+            "model": threat_engine.loader.stats,
+        })
+
+
+class MetricsHandler(BaseHandler):
+    """GET /metrics (Prometheus text) or /metrics?format=json"""
+
+    def get(self):
+        if self.get_argument("format", "prometheus") == "json":
+            self.write(threat_engine.metrics_snapshot())
+            return
+        self.set_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.write(threat_engine.metrics.prometheus())
+
+
+def make_app(batcher):
+    args = {"batcher": batcher}
+    return tornado.web.Application([
+        (r"/score", ScoreHandler, args),
+        (r"/score/batch", BatchScoreHandler, args),
+        (r"/healthz", HealthHandler, args),
+        (r"/stats", StatsHandler, args),
+        (r"/metrics", MetricsHandler, args),
+    ])
+
+
+# ================================
+# Entry Point
+# ================================
+
+async def serve(host, port, max_batch, max_wait_ms, metrics_file=None, metrics_interval=15.0):
+    threat_engine.warm_up()
+
+    batcher = MicroBatcher(max_batch=max_batch, max_wait_ms=max_wait_ms)
+    app = make_app(batcher)
+    app.listen(port, address=host)
+
+    if metrics_file:
+        # Snapshot writes are small and atomic; done on the loop between requests
+        tornado.ioloop.PeriodicCallback(
+            lambda: threat_engine.metrics.write_snapshot(metrics_file), metrics_interval * 1000
+        ).start()
+
+    print(f"Scoring service listening on http://{host}:{port}")
+    await asyncio.Event().wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP URL scoring service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch", type=int, default=256,
+                        help="Flush a batch once this many URLs are queued")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0,
+                        help="Longest a request waits for others to batch with")
+    parser.add_argument("--metrics-file", default=None,
+                        help="Periodically write a metrics snapshot here (JSON, or Prometheus text for *.prom)")
+    parser.add_argument("--metrics-interval", type=float, default=15.0,
+                        help="Seconds between metrics snapshots")
+    args = parser.parse_args(argv)
+
+    asyncio.run(serve(args.host, args.port, args.max_batch, args.max_wait_ms,
+                      args.metrics_file, args.metrics_interval))
+
+
+if __name__ == "__main__":
+    main()
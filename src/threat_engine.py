@@ -1,20 +1,111 @@
 import re
-import joblib
+import numpy as np
 import pandas as pd
 from urllib.parse import urlparse
-from collections import Counter
-import math
 import os
 
+from model_loader import ModelLoader, batch_model_path
+from allowlist import load_allowlist
+from verdict_cache import VerdictCache, cache_key
+from forest_engine import ForestEngine
+from features import BRAND_MATCHER, FEATURE_COLUMNS, extract_features_batch
+from features import extract_features as _extract_domain_features
+from metrics import MetricsRegistry
+
 
 # ================================
 # Load Model
 # ================================
 
-model_path = os.path.join("models", "final_rf_model.pkl")
-data = joblib.load(model_path)
-model = data["model"]
-threshold = data["threshold"]
+# The artifact is loaded on first use rather than at import time, so
+# importing this module (CLI --help, app startup) stays cheap. Engine
+# artifacts are memory-mapped; THREAT_MODEL_MMAP=r does the same for the
+# arrays in a pickle. The engine's feature columns must all be ones
+# features.py extracts.
+
+loader = ModelLoader(
+    mmap_mode=os.environ.get("THREAT_MODEL_MMAP") or None,
+    expected_columns=FEATURE_COLUMNS
+)
+
+# analyze_urls scores batches of BATCH_MODEL_ROWS or more uncached URLs
+# with batch_loader's model: the sklearn pickle when the engine serves
+# everything else, since sklearn is the faster of the two on large
+# batches. It is loaded the first time such a batch comes in.
+# THREAT_BATCH_MODEL_ROWS=0 scores every batch with `loader`.
+
+BATCH_MODEL_ROWS = int(os.environ.get("THREAT_BATCH_MODEL_ROWS", "500"))
+
+if BATCH_MODEL_ROWS and batch_model_path() != loader.path:
+    batch_loader = ModelLoader(
+        batch_model_path(),
+        mmap_mode=os.environ.get("THREAT_MODEL_MMAP") or None,
+        expected_columns=FEATURE_COLUMNS
+    )
+else:
+    batch_loader = loader
+
+
+def warm_up(batch_model=False):
+    """Loads the model eagerly (and the large-batch model, with
+    batch_model=True) and returns the serving loader's stats."""
+
+    if batch_model:
+        batch_loader.warm()
+    return loader.warm()
+
+
+# ================================
+# Verdict Cache
+# ================================
+
+# THREAT_CACHE_SIZE=0 disables caching; THREAT_CACHE_TTL is in seconds
+
+verdict_cache = VerdictCache(
+    maxsize=int(os.environ.get("THREAT_CACHE_SIZE", "10000")),
+    ttl=float(os.environ.get("THREAT_CACHE_TTL", "0")) or None
+)
+
+
+def cache_stats():
+    return verdict_cache.stats()
+
+
+# ================================
+# Metrics
+# ================================
+
+# Per-stage latency histograms and verdict counters, exported by
+# scoring_service's /metrics. THREAT_METRICS=0 turns them off.
+
+metrics = MetricsRegistry(enabled=os.environ.get("THREAT_METRICS", "1") != "0")
+
+STAGE_SECONDS = metrics.histogram(
+    "threat_stage_seconds", "Time spent in each stage of a scoring call (per batch for mode=batch)",
+    ("mode", "stage")
+)
+ANALYZE_SECONDS = metrics.histogram(
+    "threat_analyze_seconds", "Wall time of analyze_url (mode=single) and analyze_urls (mode=batch) calls",
+    ("mode",)
+)
+URLS_TOTAL = metrics.counter(
+    "threat_urls_total", "URLs scored, by how the verdict was reached", ("mode", "path")
+)
+VERDICTS_TOTAL = metrics.counter(
+    "threat_verdicts_total", "Verdicts returned, by risk level", ("risk_level",)
+)
+
+
+def metrics_snapshot():
+    return metrics.snapshot()
+
+
+def __getattr__(name):
+    # Backwards compatible access to threat_engine.model / .threshold
+    if name in ("model", "threshold", "feature_columns"):
+        return getattr(loader, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # ================================
 # Trusted Domains (Demo Safe)
@@ -29,20 +120,35 @@ TRUSTED_DOMAINS = [
     "notion.com"
 ]
 
+# Hashed allowlist index (see allowlist.py). Uses models/allowlist.npy when
+# it has been built, otherwise just TRUSTED_DOMAINS; both cover subdomains
+# of these entries.
+
+allowlist = load_allowlist(TRUSTED_DOMAINS)
+
 # ================================
 # URL NORMALIZER
 # ================================
 
+# Letters, digits, ".", "-", "_", ":" (IPv6) and non-ASCII (IDN) characters;
+# hosts with anything else (quotes, "<", spaces, "%") are invalid URLs
+_HOST_PATTERN = re.compile(r"[a-z0-9._:\-\u0080-\U0010ffff]+")
+
+
 def normalize_url(url):
     url = url.strip().lower()
 
     if not url.startswith(("http://", "https://")):
         url = "http://" + url
 
-    parsed = urlparse(url)
-    domain = parsed.hostname
+    # Malformed hosts (unbalanced or misplaced IPv6 brackets) make urlparse
+    # raise; they are reported as invalid URLs instead
+    try:
+        domain = urlparse(url).hostname
+    except ValueError:
+        domain = ""
 
-    if domain:
+    if domain and _HOST_PATTERN.fullmatch(domain):
         domain = domain.replace("www.", "")
     else:
         domain = ""
@@ -59,73 +165,59 @@ def extract_features(domain):
     if not domain:
         return None
 
-    features = {}
-
-    length = len(domain)
-    features["length"] = length
-    features["dot_count"] = domain.count(".")
-    features["hyphen_count"] = domain.count("-")
-
-    features["digit_ratio"] = sum(c.isdigit() for c in domain) / length if length else 0
+    return _extract_domain_features(domain)
 
-    prob = [v / length for v in Counter(domain).values()] if length else [0]
-    features["entropy"] = -sum(p * math.log2(p) for p in prob if p > 0)
 
-    suspicious_words = ["login", "secure", "verify", "account", "update", "bank"]
-    features["suspicious_word"] = int(any(word in domain for word in suspicious_words))
+def brand_impersonation(domain):
+    # Stricter than the brand_in_domain model feature: only the bare
+    # <brand>.com domain is exempt
+    return any(domain != brand + ".com" for brand in BRAND_MATCHER.matched(domain))
 
-    features["has_ip"] = int(bool(re.match(r"^\d+\.\d+\.\d+\.\d+$", domain)))
 
-    risky_tlds = ["xyz", "top", "club", "live", "online", "site", "info"]
-    features["risky_tld"] = int(domain.split(".")[-1] in risky_tlds)
-
-    popular_brands = ["paypal", "google", "amazon", "microsoft", "apple"]
-    features["brand_in_domain"] = int(
-        any(brand in domain and domain != brand + ".com" for brand in popular_brands)
-    )
-
-    features["subdomain_count"] = max(domain.count(".") - 1, 0)
+# ================================
+# MODEL INFERENCE
+# ================================
 
-    vowels = "aeiou"
-    features["vowel_ratio"] = sum(c in vowels for c in domain) / length if length else 0
+def _model_input(X, source):
+    """X (float64, model column order) as the model `source` loaded takes
+    it: exported forests take the matrix directly, sklearn wants named
+    columns."""
 
-    return features
+    if isinstance(source.model, ForestEngine):
+        return X
 
+    columns = source.feature_columns or FEATURE_COLUMNS
+    return pd.DataFrame(X, columns=columns)
 
 # ================================
-# MAIN ANALYZER
+# RESULT BUILDERS
 # ================================
 
-def analyze_url(url):
+def _invalid_result():
+    return {
+        "domain": "Invalid URL",
+        "probability": 0,
+        "prediction": 1,
+        "threat_score": 100,
+        "risk_level": "HIGH",
+        "reasons": ["Invalid or malformed URL"]
+    }
 
-    full_url, domain = normalize_url(url)
 
-    if not domain:
-        return {
-            "domain": "Invalid URL",
-            "probability": 0,
-            "prediction": 1,
-            "threat_score": 100,
-            "risk_level": "HIGH",
-            "reasons": ["Invalid or malformed URL"]
-        }
+def _trusted_result(domain):
+    return {
+        "domain": domain,
+        "probability": 0.01,
+        "prediction": 0,
+        "threat_score": 5,
+        "risk_level": "LOW",
+        "reasons": ["Trusted legitimate domain"]
+    }
 
-    # 🔥 DEMO SAFE RULE
-    if domain in TRUSTED_DOMAINS:
-        return {
-            "domain": domain,
-            "probability": 0.01,
-            "prediction": 0,
-            "threat_score": 5,
-            "risk_level": "LOW",
-            "reasons": ["Trusted legitimate domain"]
-        }
 
-    feat = extract_features(domain)
-    df = pd.DataFrame([feat])
+def _score_result(full_url, domain, feat, prob):
 
-    prob = model.predict_proba(df)[0][1]
-    prediction = int(prob >= threshold)
+    prediction = int(prob >= loader.threshold)
 
     # Base threat score from ML probability
     threat_score = int(prob * 100)
@@ -143,7 +235,7 @@ def analyze_url(url):
         threat_score += 10
         reasons.append("Suspicious keyword detected")
 
-    if feat["brand_in_domain"]:
+    if brand_impersonation(domain):
         threat_score += 15
         reasons.append("Brand impersonation attempt")
 
@@ -202,4 +294,130 @@ def analyze_url(url):
         "threat_score": threat_score,
         "risk_level": risk_level,
         "reasons": reasons
-    }
\ No newline at end of file
+    }
+
+
+# ================================
+# MAIN ANALYZER
+# ================================
+
+def _count(mode, path, result):
+    if metrics.enabled:
+        URLS_TOTAL.inc(mode, path)
+        VERDICTS_TOTAL.inc(result["risk_level"])
+    return result
+
+
+def analyze_url(url):
+
+    timer = metrics.timer(STAGE_SECONDS, ANALYZE_SECONDS, "single")
+
+    full_url, domain = normalize_url(url)
+    timer.lap("normalize")
+
+    if not domain:
+        timer.finish()
+        return _count("single", "invalid", _invalid_result())
+
+    # 🔥 DEMO SAFE RULE
+    if domain in allowlist:
+        timer.finish()
+        return _count("single", "allowlist", _trusted_result(domain))
+
+    key = cache_key(full_url, domain)
+    cached = verdict_cache.get(key, loader.version)
+    timer.lap("lookup")
+    if cached is not None:
+        timer.finish()
+        return _count("single", "cache", cached)
+
+    feat = extract_features(domain)
+    timer.lap("features")
+
+    columns = loader.feature_columns or FEATURE_COLUMNS
+    X = _model_input(np.array([[feat[c] for c in columns]], dtype=np.float64), loader)
+    timer.lap("frame")
+
+    prob = loader.model.predict_proba(X)[0, 1]
+    timer.lap("predict")
+
+    result = _score_result(full_url, domain, feat, prob)
+    timer.lap("heuristics")
+
+    verdict_cache.put(key, loader.version, result)
+    timer.finish()
+
+    return _count("single", "model", result)
+
+
+# ================================
+# BATCH ANALYZER
+# ================================
+
+def analyze_urls(urls):
+    """Scores many URLs with a single predict_proba call.
+
+    Returns one dict per input URL, identical to what analyze_url gives.
+    BATCH_MODEL_ROWS or more URLs to score go through batch_loader's model.
+    Stage timings are recorded once per call, for the whole batch.
+    """
+
+    timer = metrics.timer(STAGE_SECONDS, ANALYZE_SECONDS, "batch")
+
+    normalized = [normalize_url(url) for url in urls]
+    timer.lap("normalize")
+
+    results = []
+    pending = []
+    paths = {"invalid": 0, "allowlist": 0, "cache": 0, "model": 0}
+    version = loader.version
+
+    for full_url, domain in normalized:
+        if not domain:
+            results.append(_invalid_result())
+            paths["invalid"] += 1
+        elif domain in allowlist:
+            results.append(_trusted_result(domain))
+            paths["allowlist"] += 1
+        else:
+            cached = verdict_cache.get(cache_key(full_url, domain), version)
+            if cached is None:
+                pending.append((len(results), full_url, domain))
+            else:
+                paths["cache"] += 1
+            results.append(cached)
+    timer.lap("lookup")
+
+    if pending:
+        paths["model"] = len(pending)
+
+        matrix = extract_features_batch([domain for _, _, domain in pending], dtype=np.float64)
+        timer.lap("features")
+
+        source = batch_loader if len(pending) >= BATCH_MODEL_ROWS else loader
+        columns = source.feature_columns or FEATURE_COLUMNS
+        X = _model_input(matrix[:, [FEATURE_COLUMNS.index(c) for c in columns]], source)
+        timer.lap("frame")
+
+        probs = source.model.predict_proba(X)[:, 1]
+        timer.lap("predict")
+
+        for (i, full_url, domain), row, prob in zip(pending, matrix, probs):
+            feat = dict(zip(FEATURE_COLUMNS, row))
+            results[i] = _score_result(full_url, domain, feat, prob)
+            verdict_cache.put(cache_key(full_url, domain), version, results[i])
+        timer.lap("heuristics")
+
+    timer.finish()
+
+    if metrics.enabled:
+        for path, n in paths.items():
+            if n:
+                URLS_TOTAL.inc("batch", path, n=n)
+        risks = {}
+        for result in results:
+            risks[result["risk_level"]] = risks.get(result["risk_level"], 0) + 1
+        for risk, n in risks.items():
+            VERDICTS_TOTAL.inc(risk, n=n)
+
+    return results
@@ -1,12 +1,13 @@
+import argparse
+import time
+
 import pandas as pd
 import numpy as np
 import joblib
-import re
-import math
 import matplotlib.pyplot as plt
 
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
 from sklearn.metrics import (
     classification_report,
     confusion_matrix,
@@ -14,201 +15,250 @@ from sklearn.metrics import (
     precision_score,
     recall_score
 )
-from sklearn.calibration import CalibratedClassifierCV
-
-
-# =====================================
-# Feature Engineering
-# =====================================
-
-def domain_entropy(domain):
-    prob = [float(domain.count(c)) / len(domain) for c in dict.fromkeys(list(domain))]
-    return -sum([p * math.log2(p) for p in prob])
-
-def extract_features(domain):
-    domain = domain.lower()
-    features = {}
-
-    features["length"] = len(domain)
-    features["dot_count"] = domain.count(".")
-    features["hyphen_count"] = domain.count("-")
-    features["digit_ratio"] = sum(c.isdigit() for c in domain) / len(domain)
-    features["entropy"] = domain_entropy(domain)
-
-    suspicious_words = ["login", "secure", "verify", "account", "update", "bank"]
-    features["suspicious_word"] = int(any(word in domain for word in suspicious_words))
 
-    features["has_ip"] = int(bool(re.match(r"^\d+\.\d+\.\d+\.\d+$", domain)))
-
-    risky_tlds = ["xyz", "top", "club", "live", "online", "site", "info"]
-    features["risky_tld"] = int(domain.split(".")[-1] in risky_tlds)
-
-    popular_brands = ["paypal", "google", "amazon", "microsoft", "apple"]
-    features["brand_in_domain"] = int(
-        any(brand in domain and not domain.startswith(brand + ".") for brand in popular_brands)
-    )
-
-    features["subdomain_count"] = max(domain.count(".") - 1, 0)
-
-    vowels = "aeiou"
-    features["vowel_ratio"] = sum(c in vowels for c in domain) / len(domain)
-
-    return features
+from calibration import CALIBRATION_MODES, calibrate_forest, calibration_summary, print_summaries
+from feature_cache import FeatureCache
+from features import FEATURE_COLUMNS, extract_features, extract_features_parallel
+from forest_engine import ForestEngine, save_engine
+from model_search import SEARCH_MODES, base_forest, run_search, search_tasks
+from resources import add_budget_args, budget_from_args, forest_fit_bytes
 
 
 # =====================================
 # Load Dataset
 # =====================================
 
-df = pd.read_csv("data/final_balanced_dataset.csv")
+def load_dataset(path, use_cache=True, n_jobs=None):
+    df = pd.read_csv(path)
 
-X = pd.DataFrame([extract_features(d) for d in df["domain"]])
-y = df["label"]
+    if use_cache:
+        X = FeatureCache(n_jobs=n_jobs).features(df["domain"])
+    else:
+        X = pd.DataFrame(extract_features_parallel(df["domain"], n_jobs=n_jobs), columns=FEATURE_COLUMNS)
+    y = df["label"]
 
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y,
-    test_size=0.2,
-    stratify=y,
-    random_state=42
-)
+    return X, y
 
 
 # =====================================
-# Grid Search
+# Hyperparameter Search
 # =====================================
 
-param_grid = {
-    "n_estimators": [400, 600, 800],
-    "max_depth": [12, 16, None],
-    "min_samples_split": [2, 4, 6],
-    "min_samples_leaf": [1, 2, 3],
-    "max_features": ["sqrt", "log2"]
-}
-
-base_model = RandomForestClassifier(
-    class_weight="balanced",
-    n_jobs=-1,
-    random_state=42
-)
-
-grid_search = GridSearchCV(
-    estimator=base_model,
-    param_grid=param_grid,
-    cv=3,
-    scoring="roc_auc",
-    verbose=2,
-    n_jobs=-1
-)
-
-print("\nRunning GridSearch...")
-grid_search.fit(X_train, y_train)
+def search_forest(X_train, y_train, args, budget):
+    # Split the cores between parallel candidate fits and the trees of each
+    # forest instead of letting both levels use every core
+    task_bytes = forest_fit_bytes(len(X_train) * 2 // 3, X_train.shape[1], 800)
+    search_jobs, forest_jobs = budget.split(search_tasks(args.search), task_bytes)
+    print(f"\nSearch workers: {search_jobs} x {forest_jobs} forest cores")
+
+    params, _ = run_search(
+        args.search, X_train, y_train,
+        time_budget=args.time_budget,
+        target_auc=args.target_auc,
+        log_path=args.search_log,
+        n_jobs=search_jobs,
+        forest_jobs=forest_jobs
+    )
 
-print("\nBest Parameters Found:")
-print(grid_search.best_params_)
+    print("\nSelected Parameters:")
+    print(params)
 
-rf_model = grid_search.best_estimator_
+    # Single fits from here on get the whole budget
+    return base_forest(n_jobs=budget.cores).set_params(**params)
 
 
 # =====================================
 # Probability Calibration (FIXED)
 # =====================================
 
-print("\nApplying Probability Calibration...")
+def calibrate(rf_model, X_train, y_train, mode="oob"):
+    """Fits the forest and its calibration; returns (model, forest, seconds)."""
 
-calibrated_model = CalibratedClassifierCV(
-    estimator=rf_model,   # 🔥 FIXED HERE
-    method="sigmoid",
-    cv=3
-)
+    print(f"\nApplying Probability Calibration ({mode})...")
 
-calibrated_model.fit(X_train, y_train)
-model = calibrated_model
+    start = time.perf_counter()
+    calibrated_model, fitted_forest = calibrate_forest(rf_model, X_train, y_train, mode)
+    return calibrated_model, fitted_forest, time.perf_counter() - start
 
 
 # =====================================
 # Evaluation
 # =====================================
 
-y_prob = model.predict_proba(X_test)[:, 1]
+def evaluate(model, X_test, y_test):
+    y_prob = model.predict_proba(X_test)[:, 1]
 
-print("\nROC-AUC Score:", roc_auc_score(y_test, y_prob))
+    print("\nROC-AUC Score:", roc_auc_score(y_test, y_prob))
 
-print("\n--- Threshold Analysis ---")
+    print("\n--- Threshold Analysis ---")
 
-best_threshold = 0.3  # phishing me recall important hota hai
+    best_threshold = 0.3  # phishing me recall important hota hai
 
-for t in np.arange(0.25, 0.56, 0.05):
-    y_pred = (y_prob >= t).astype(int)
-    print(
-        f"Threshold {t:.2f} -> "
-        f"Precision: {precision_score(y_test, y_pred):.3f}, "
-        f"Recall: {recall_score(y_test, y_pred):.3f}"
-    )
+    for t in np.arange(0.25, 0.56, 0.05):
+        y_pred = (y_prob >= t).astype(int)
+        print(
+            f"Threshold {t:.2f} -> "
+            f"Precision: {precision_score(y_test, y_pred):.3f}, "
+            f"Recall: {recall_score(y_test, y_pred):.3f}"
+        )
+
+    print(f"\nSelected Threshold: {best_threshold}")
 
-print(f"\nSelected Threshold: {best_threshold}")
+    y_pred_final = (y_prob >= best_threshold).astype(int)
 
-y_pred_final = (y_prob >= best_threshold).astype(int)
+    print("\nClassification Report:")
+    print(classification_report(y_test, y_pred_final))
 
-print("\nClassification Report:")
-print(classification_report(y_test, y_pred_final))
+    print("\nConfusion Matrix:")
+    print(confusion_matrix(y_test, y_pred_final))
 
-print("\nConfusion Matrix:")
-print(confusion_matrix(y_test, y_pred_final))
+    return best_threshold
 
 
 # =====================================
 # Feature Importance
 # =====================================
 
-importance_df = pd.DataFrame({
-    "feature": X.columns,
-    "importance": rf_model.feature_importances_
-}).sort_values(by="importance", ascending=False)
+def report_feature_importance(rf_model, columns):
+    importance_df = pd.DataFrame({
+        "feature": columns,
+        "importance": rf_model.feature_importances_
+    }).sort_values(by="importance", ascending=False)
 
-print("\nFeature Importance:")
-print(importance_df)
+    print("\nFeature Importance:")
+    print(importance_df)
 
-plt.figure()
-plt.bar(importance_df["feature"], importance_df["importance"])
-plt.xticks(rotation=45)
-plt.title("Feature Importance")
-plt.tight_layout()
-plt.close()
+    plt.figure()
+    plt.bar(importance_df["feature"], importance_df["importance"])
+    plt.xticks(rotation=45)
+    plt.title("Feature Importance")
+    plt.tight_layout()
+    plt.close()
 
 
 # =====================================
 # Save Model
 # =====================================
 
-joblib.dump({
-    "model": model,
-    "feature_columns": X.columns.tolist(),
-    "threshold": best_threshold
-}, "models/final_rf_model.pkl")
+def save_model(model, columns, threshold, data_path):
+    joblib.dump({
+        "model": model,
+        "feature_columns": columns,
+        "threshold": threshold
+    }, "models/final_rf_model.pkl")
+
+    # Memory-mappable artifact for serving (see forest_engine.py)
+    save_engine(
+        "models/final_rf_engine",
+        ForestEngine.from_model(model),
+        threshold,
+        columns,
+        training_data=data_path
+    )
 
-print("\nModel saved successfully.")
+    print("\nModel saved successfully.")
 
 
 # =====================================
 # Manual Testing
 # =====================================
 
-print("\n--- Manual Domain Testing ---")
-
-test_domains = [
-    "google.com",
-    "amazon.com",
-    "microsoft.com",
-    "paypal-secure-login.com",
-    "free-bitcoin-now.xyz",
-    "secure-update-account.xyz",
-    "apple-support-login.live",
-    "ghkdfkjh.biz",
-    "login-bank-update.com"
-]
-
-for d in test_domains:
-    feat = pd.DataFrame([extract_features(d)])
-    prob = model.predict_proba(feat)[0][1]
-    prediction = int(prob >= best_threshold)
-    print(f"{d} -> Malicious Probability: {prob:.4f} | Prediction: {prediction}")
\ No newline at end of file
+def manual_testing(model, threshold):
+    print("\n--- Manual Domain Testing ---")
+
+    test_domains = [
+        "google.com",
+        "amazon.com",
+        "microsoft.com",
+        "paypal-secure-login.com",
+        "free-bitcoin-now.xyz",
+        "secure-update-account.xyz",
+        "apple-support-login.live",
+        "ghkdfkjh.biz",
+        "login-bank-update.com"
+    ]
+
+    for d in test_domains:
+        feat = pd.DataFrame([extract_features(d)])
+        prob = model.predict_proba(feat)[0][1]
+        prediction = int(prob >= threshold)
+        print(f"{d} -> Malicious Probability: {prob:.4f} | Prediction: {prediction}")
+
+
+# =====================================
+# Main
+# =====================================
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the URL threat model.")
+    parser.add_argument("--data", default="data/final_balanced_dataset.csv")
+    parser.add_argument("--no-feature-cache", dest="feature_cache", action="store_false",
+                        help="Extract features from scratch instead of using cache/features")
+    parser.add_argument("--feature-jobs", type=int, default=None,
+                        help="Processes for feature extraction (default: --cores)")
+    parser.add_argument("--search", choices=SEARCH_MODES, default="halving",
+                        help="grid: exhaustive 162 combinations; halving: successive halving "
+                             "on tree count; random: randomized under --time-budget")
+    parser.add_argument("--time-budget", type=float, default=1800,
+                        help="Wall-clock seconds for --search random")
+    parser.add_argument("--target-auc", type=float, default=None,
+                        help="Pick the cheapest candidate with at least this CV AUC")
+    parser.add_argument("--search-log", default=None,
+                        help="Write every candidate's AUC and cost to this CSV")
+    parser.add_argument("--calibration", choices=CALIBRATION_MODES, default="oob",
+                        help="cv: sigmoid over 3 refitted forests (original); oob: one forest, "
+                             "sigmoid on out-of-bag scores; holdout: one forest, sigmoid on a "
+                             "20%% held-out split")
+    parser.add_argument("--compare-calibration", action="store_true",
+                        help="Also fit the other calibration modes and report time, size, "
+                             "latency, Brier score and log-loss side by side")
+    add_budget_args(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    budget = budget_from_args(args)
+
+    with budget.limit_threads():
+        with budget.phase("features"):
+            X, y = load_dataset(
+                args.data, use_cache=args.feature_cache,
+                n_jobs=args.feature_jobs or budget.cores
+            )
+
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y,
+            test_size=0.2,
+            stratify=y,
+            random_state=42
+        )
+
+        with budget.phase("search"):
+            forest = search_forest(X_train, y_train, args, budget)
+
+        with budget.phase("calibration"):
+            model, rf_model, fit_seconds = calibrate(clone(forest), X_train, y_train, args.calibration)
+
+        with budget.phase("evaluation"):
+            best_threshold = evaluate(model, X_test, y_test)
+
+            summaries = {args.calibration: calibration_summary(model, X_test, y_test, fit_seconds)}
+            if args.compare_calibration:
+                for mode in CALIBRATION_MODES:
+                    if mode != args.calibration:
+                        other, _, seconds = calibrate(clone(forest), X_train, y_train, mode)
+                        summaries[mode] = calibration_summary(other, X_test, y_test, seconds)
+            print_summaries(summaries)
+            report_feature_importance(rf_model, X.columns)
+
+        with budget.phase("save"):
+            save_model(model, X.columns.tolist(), best_threshold, args.data)
+
+        manual_testing(model, best_threshold)
+
+    budget.summary()
+
+
+if __name__ == "__main__":
+    main()
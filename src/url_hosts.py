@@ -0,0 +1,115 @@
+import argparse
+import re
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+# Characters str.strip() removes from ASCII text
+_ASCII_WHITESPACE = " \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+
+# The netloc runs from after the scheme to the first "/", "?" or "#";
+# the host is what follows the last "@" in it, up to the first ":"
+_NETLOC_PATTERN = r"^https?://(?P<netloc>[^/?#]*)"
+
+# Host characters threat_engine.normalize_url accepts
+_HOST_PATTERN = re.compile(r"[a-z0-9._:\-\u0080-\U0010ffff]+")
+
+
+def url_host(url):
+    """The domain threat_engine.normalize_url returns for url, or "" if
+    urlparse rejects it or the host has characters no hostname has."""
+
+    url = url.strip().lower()
+
+    if not url.startswith(("http://", "https://")):
+        url = "http://" + url
+
+    try:
+        domain = urlparse(url).hostname
+    except ValueError:
+        return ""
+
+    if not domain or not _HOST_PATTERN.fullmatch(domain):
+        return ""
+    return domain.replace("www.", "")
+
+
+def extract_hosts(urls):
+    """Vectorized url_host over a column of URLs.
+
+    ASCII URLs without IPv6 brackets go through pyarrow string kernels;
+    the rest (non-ASCII, bracketed hosts, which urlparse validates) use
+    url_host row by row. Missing values map to "". Returns a Series of
+    str aligned with `urls`.
+    """
+
+    s = pd.Series(urls, dtype="string[pyarrow]")
+    hosts = pd.Series("", index=s.index, dtype="string[pyarrow]")
+
+    present = s.notna().to_numpy()
+    ascii_ = pc.fill_null(pc.string_is_ascii(pa.array(s)), False)
+    simple = present & ascii_.to_numpy(zero_copy_only=False)
+    simple &= ~s.str.contains(r"[\[\]]", regex=True).fillna(False).to_numpy(dtype=bool)
+
+    v = s[simple].str.strip(_ASCII_WHITESPACE).str.lower()
+    has_scheme = v.str.startswith("http://") | v.str.startswith("https://")
+    v = v.where(has_scheme, "http://" + v)
+
+    # urlsplit drops tabs and newlines anywhere in the URL
+    v = pa.array(v.str.replace(r"[\t\r\n]", "", regex=True))
+
+    netloc = pc.struct_field(pc.extract_regex(v, _NETLOC_PATTERN), [0])
+    host = pc.replace_substring_regex(netloc, r"^.*@", "")
+    host = pc.replace_substring_regex(host, r":.*$", "")
+    host = pc.if_else(pc.match_substring_regex(host, r"^[a-z0-9._\-]+$"), host, "")
+    hosts[simple] = pc.replace_substring(host, "www.", "").to_pandas().to_numpy()
+
+    rest = present & ~simple
+    if rest.any():
+        hosts[rest] = [url_host(u) for u in s[rest].tolist()]
+
+    return hosts.astype(object)
+
+
+# ================================
+# Benchmark CLI
+# ================================
+
+def _apply_hosts(urls):
+    """The previous per-row path used by the dataset scripts."""
+    return urls.apply(lambda x: urlparse(str(x)).netloc.lower().replace("www.", ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark vectorized host extraction against apply(urlparse).")
+    parser.add_argument("input", help="CSV file with a URL column")
+    parser.add_argument("--column", default="url")
+    parser.add_argument("--rows", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    urls = pd.read_csv(args.input, usecols=[args.column], nrows=args.rows)[args.column]
+    print(f"{len(urls):,} URLs")
+
+    timings = {}
+    for name, fn in [
+        ("apply(urlparse().netloc)", _apply_hosts),
+        ("apply(url_host)", lambda u: u.astype(str).apply(url_host)),
+        ("extract_hosts", extract_hosts),
+    ]:
+        start = time.perf_counter()
+        fn(urls)
+        timings[name] = time.perf_counter() - start
+        print(f"{name:<28} {timings[name]:8.3f}s  {len(urls) / timings[name]:>14,.0f} URLs/s")
+
+    reference = urls.fillna("").astype(str).apply(url_host)
+    agree = np.mean(extract_hosts(urls).to_numpy() == reference.to_numpy())
+    print(f"\nextract_hosts agrees with url_host on {agree:.4%} of rows")
+
+
+if __name__ == "__main__":
+    main()
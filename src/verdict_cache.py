@@ -0,0 +1,137 @@
+import threading
+
+from cachetools import LRUCache, TTLCache
+
+
+# ================================
+# Counting Caches
+# ================================
+
+class _CountingLRUCache(LRUCache):
+
+    def __init__(self, maxsize):
+        super().__init__(maxsize)
+        self.evictions = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+
+class _CountingTTLCache(TTLCache):
+
+    def __init__(self, maxsize, ttl):
+        super().__init__(maxsize, ttl)
+        self.evictions = 0
+        self.expirations = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        self.expirations += len(expired)
+        return expired
+
+
+# ================================
+# Verdict Cache
+# ================================
+
+def cache_key(full_url, domain):
+    """Everything analyze_url's result depends on besides the model.
+
+    The URL-level heuristics only look at the scheme, the presence of '@'
+    and whether the URL is longer than 75 characters, so those are keyed
+    as flags rather than on the full URL.
+    """
+    return (
+        domain,
+        full_url.startswith("https"),
+        "@" in full_url,
+        len(full_url) > 75,
+    )
+
+
+class VerdictCache:
+    """Thread-safe LRU (optionally TTL) cache of analyze_url results.
+
+    Entries are tied to a model version; looking up with a different
+    version clears the cache. Results are copied in and out so callers
+    can mutate what they get back.
+    """
+
+    def __init__(self, maxsize=10000, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._version = None
+        self._cache = self._new_cache()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _new_cache(self):
+        if self.ttl:
+            return _CountingTTLCache(self.maxsize, self.ttl)
+        return _CountingLRUCache(self.maxsize)
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0
+
+    def _reset(self):
+        # A fresh cache object instead of clear(), which would pop every
+        # entry through popitem and count them as evictions
+        old = self._cache
+        self._cache = self._new_cache()
+        self._cache.evictions = old.evictions
+        if hasattr(old, "expirations"):
+            self._cache.expirations = old.expirations
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._version is not None:
+                self.invalidations += 1
+            self._version = version
+            self._reset()
+
+    def get(self, key, version):
+        with self._lock:
+            self._check_version(version)
+            result = self._cache.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return dict(result, reasons=list(result["reasons"]))
+
+    def put(self, key, version, result):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._cache[key] = dict(result, reasons=list(result["reasons"]))
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self._cache.evictions,
+                "expirations": getattr(self._cache, "expirations", 0),
+                "invalidations": self.invalidations,
+                "model_version": self._version,
+            }
@@ -0,0 +1,59 @@
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+
+from features import FEATURE_COLUMNS, extract_features_batch  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def dataset():
+    """A fixed sample of the balanced training data."""
+    df = pd.read_csv(os.path.join(REPO_ROOT, "data", "final_balanced_dataset.csv")).dropna()
+    return df.sample(n=1500, random_state=0).reset_index(drop=True)
+
+
+@pytest.fixture(scope="session")
+def domains(dataset):
+    return dataset["domain"].astype(str).tolist()
+
+
+@pytest.fixture(scope="session")
+def feature_frame(domains):
+    return pd.DataFrame(extract_features_batch(domains, dtype=np.float64), columns=FEATURE_COLUMNS)
+
+
+@pytest.fixture(scope="session")
+def forest(dataset, feature_frame):
+    from sklearn.ensemble import RandomForestClassifier
+
+    return RandomForestClassifier(n_estimators=25, max_depth=12, random_state=0, n_jobs=1).fit(
+        feature_frame, dataset["label"]
+    )
+
+
+@pytest.fixture
+def engine_with_model(tmp_path, monkeypatch, forest):
+    """threat_engine scoring with the test forest and no verdict cache: the
+    exported engine serves, the pickle scores large batches."""
+
+    import threat_engine
+    from forest_engine import ForestEngine, save_engine
+    from model_loader import ModelLoader
+    from verdict_cache import VerdictCache
+
+    path = tmp_path / "model.pkl"
+    joblib.dump({"model": forest, "feature_columns": FEATURE_COLUMNS, "threshold": 0.5}, path)
+    engine_path = tmp_path / "engine"
+    save_engine(str(engine_path), ForestEngine.from_model(forest), 0.5, FEATURE_COLUMNS)
+
+    monkeypatch.setattr(threat_engine, "loader", ModelLoader(str(engine_path), expected_columns=FEATURE_COLUMNS))
+    monkeypatch.setattr(threat_engine, "batch_loader", ModelLoader(str(path)))
+    monkeypatch.setattr(threat_engine, "verdict_cache", VerdictCache(maxsize=0))
+    return threat_engine
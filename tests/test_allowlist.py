@@ -0,0 +1,47 @@
+import numpy as np
+
+from allowlist import AllowlistIndex, load_allowlist
+
+
+def test_suffix_entries_cover_subdomains():
+    index = AllowlistIndex.build(exact=["example.org"], suffix=["google.com", "WWW.Notion.com "])
+
+    assert "google.com" in index
+    assert "mail.google.com" in index
+    assert "a.b.google.com" in index
+    assert "notion.com" in index
+    assert "api.notion.com" in index
+
+    assert "google.com.evil.io" not in index
+    assert "notgoogle.com" not in index
+    assert "com" not in index
+
+
+def test_exact_entries_do_not_cover_subdomains():
+    index = AllowlistIndex.build(exact=["example.org"])
+
+    assert "example.org" in index
+    assert "login.example.org" not in index
+
+
+def test_empty_index_matches_nothing():
+    assert "google.com" not in AllowlistIndex.build()
+
+
+def test_saved_index_loads_memory_mapped(tmp_path):
+    path = str(tmp_path / "allowlist.npy")
+    AllowlistIndex.build(exact=["example.org"], suffix=["google.com"]).save(path)
+
+    index = load_allowlist(["other.com"], path=path)
+
+    assert isinstance(index.keys, np.memmap)
+    assert len(index) == 2
+    assert "docs.google.com" in index
+    assert "other.com" not in index
+
+
+def test_missing_index_falls_back_to_seed_suffixes(tmp_path):
+    index = load_allowlist(["github.com"], path=str(tmp_path / "missing.npy"))
+
+    assert "gist.github.com" in index
+    assert len(index) == 1
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import history_store
+from conftest import REPO_ROOT
+
+PAYLOAD = "<img src=x onerror=alert(1)>"
+
+
+@pytest.fixture
+def app(engine_with_model, tmp_path, monkeypatch):
+    """app.py against an empty history database in tmp_path."""
+
+    monkeypatch.setattr(history_store, "DEFAULT_HISTORY_PATH", str(tmp_path / "history.db"))
+    st.cache_resource.clear()
+    yield AppTest.from_file(os.path.join(REPO_ROOT, "src", "app.py"), default_timeout=60)
+    st.cache_resource.clear()
+
+
+def test_history_escapes_stored_domains(app, engine_with_model):
+    store = history_store.HistoryStore()
+
+    # An uploaded file, as the upload tab stores it, plus a row written
+    # before hosts were validated
+    urls = [f"http://{PAYLOAD}.com/path", "paypal-login.xyz"]
+    store.add_many([dict(r, url=u) for u, r in zip(urls, engine_with_model.analyze_urls(urls))])
+    store.add_many([{
+        "url": urls[0], "domain": f"{PAYLOAD}.com",
+        "risk_level": "HIGH", "threat_score": 90, "probability": 0.9,
+    }])
+
+    app.run()
+    assert not app.exception
+
+    rendered = "\n".join(m.value for m in app.markdown)
+    assert "&lt;img src=x onerror=alert(1)&gt;.com" in rendered
+    assert PAYLOAD not in rendered
+    assert "paypal-login.xyz" in rendered
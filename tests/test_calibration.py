@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from sklearn.base import clone
+
+from calibration import SingleForestCalibratedClassifier, calibrate_forest
+from forest_engine import ForestEngine
+
+
+@pytest.mark.parametrize("method", ["oob", "holdout"])
+def test_single_forest_calibration_exports_to_the_engine(method, forest, dataset, feature_frame):
+    model, fitted = calibrate_forest(clone(forest), feature_frame, dataset["label"], mode=method)
+
+    assert model.estimator_ is fitted
+    assert len(model.calibrated_classifiers_) == 1
+    assert len(fitted.estimators_) == forest.n_estimators
+
+    proba = model.predict_proba(feature_frame)
+    np.testing.assert_allclose(proba.sum(axis=1), 1.0)
+    np.testing.assert_allclose(
+        ForestEngine.from_model(model).predict_proba(np.asarray(feature_frame, dtype=np.float64)),
+        proba, atol=1e-9,
+    )
+    assert (model.predict(feature_frame) == model.classes_[proba.argmax(axis=1)]).all()
+
+
+def test_from_prefit_keeps_the_forest(forest, dataset, feature_frame):
+    model = SingleForestCalibratedClassifier.from_prefit(forest, feature_frame, dataset["label"])
+
+    assert model.estimator_ is forest
+    raw = forest.predict_proba(feature_frame)[:, 1]
+    calibrated = model.predict_proba(feature_frame)[:, 1]
+    # The sigmoid is monotonic in the forest's score
+    order = np.argsort(raw, kind="stable")
+    assert (np.diff(calibrated[order]) >= -1e-12).all()
+
+
+def test_unknown_method_is_rejected(forest, dataset, feature_frame):
+    with pytest.raises(ValueError, match="Unknown calibration method"):
+        SingleForestCalibratedClassifier(clone(forest), method="isotonic").fit(feature_frame, dataset["label"])
@@ -0,0 +1,37 @@
+import os
+
+import pandas as pd
+
+import compact_model
+
+
+def test_data_default_does_not_depend_on_the_working_directory(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    args = compact_model.parse_args([])
+    assert os.path.isabs(args.data)
+    assert os.path.isfile(args.data)
+
+
+def test_subset_candidates_halve_the_forest(forest):
+    pooled = compact_model.pooled_forest(forest)
+    pooled.estimators_ = pooled.estimators_ * 4
+    pooled.set_params(n_estimators=len(pooled.estimators_))
+
+    candidates = dict(compact_model.subset_candidates(pooled))
+    assert list(candidates) == ["subset n=50", "subset n=25", "subset n=12"]
+    assert candidates["subset n=12"].estimators_ == pooled.estimators_[:12]
+    assert len(pooled.estimators_) == 100
+
+
+def test_select_picks_the_smallest_candidate_within_tolerance():
+    report = pd.DataFrame([
+        {"name": "original", "auc": 0.99, "engine_bytes": 900, "engine_us_per_url": 90},
+        {"name": "small", "auc": 0.90, "engine_bytes": 100, "engine_us_per_url": 10},
+        {"name": "medium", "auc": 0.985, "engine_bytes": 300, "engine_us_per_url": 30},
+        {"name": "large", "auc": 0.99, "engine_bytes": 500, "engine_us_per_url": 20},
+    ])
+
+    assert compact_model.select(report, 0.99, tolerance=0.01) == "medium"
+    assert compact_model.select(report, 0.99, tolerance=0.01, target_us=25) == "large"
+    assert compact_model.select(report, 0.99, tolerance=0.01, target_bytes=200) is None
+    assert compact_model.select(report, 0.99, tolerance=0.1) == "small"
@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataset_stream import CsvAppender, SeenHashes, hash_rows, hash_strings
+
+
+def test_seen_hashes_matches_a_set_across_chunks():
+    rng = np.random.default_rng(0)
+    seen, reference = SeenHashes(), set()
+
+    for _ in range(20):
+        chunk = rng.integers(0, 5000, size=rng.integers(1, 800)).astype(np.uint64)
+        new = seen.add(chunk)
+
+        expected = []
+        for value in chunk.tolist():
+            expected.append(value not in reference)
+            reference.add(value)
+        assert new.tolist() == expected
+
+    assert len(seen) == len(reference)
+    # Runs are merged so only O(log n) remain
+    assert len(seen.runs) <= int(np.log2(len(reference))) + 1
+
+
+def test_hashes_dedup_strings_and_rows():
+    assert SeenHashes().add(hash_strings(["a.com", "b.com", "a.com"])).tolist() == [True, True, False]
+
+    frame = pd.DataFrame({"domain": ["a.com", "a.com", "a.com"], "label": [1, 0, 1]})
+    assert SeenHashes().add(hash_rows(frame)).tolist() == [True, True, False]
+
+
+def test_csv_appender_writes_one_header_and_publishes_on_close(tmp_path):
+    path = str(tmp_path / "out.csv")
+
+    with CsvAppender(path) as out:
+        out.write(pd.DataFrame({"domain": ["a.com"], "label": [1]}))
+        out.write(pd.DataFrame({"domain": ["b.com", "c.com"], "label": [0, 1]}))
+        assert not os.path.exists(path)
+
+    assert out.rows == 3
+    assert pd.read_csv(path)["domain"].tolist() == ["a.com", "b.com", "c.com"]
+
+
+def test_csv_appender_discards_output_on_error(tmp_path):
+    path = str(tmp_path / "out.csv")
+
+    with pytest.raises(RuntimeError):
+        with CsvAppender(path) as out:
+            out.write(pd.DataFrame({"domain": ["a.com"]}))
+            raise RuntimeError("failed mid-stream")
+
+    assert os.listdir(tmp_path) == []
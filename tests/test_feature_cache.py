@@ -0,0 +1,28 @@
+import numpy as np
+
+from feature_cache import FeatureCache
+from features import FEATURE_COLUMNS, extract_features_batch
+
+
+def test_features_match_extraction_and_persist(tmp_path):
+    domains = ["a.com", "paypal-login.xyz", "a.com", "x1.io"]
+
+    frame = FeatureCache(root=str(tmp_path)).features(domains)
+
+    expected = extract_features_batch(domains, dtype=np.float32)
+    np.testing.assert_array_equal(frame[FEATURE_COLUMNS].to_numpy(), expected)
+
+    # A fresh instance reads the parts written by the first
+    cache = FeatureCache(root=str(tmp_path))
+    assert len(cache) == 3
+    assert cache.add(domains) == 0
+
+
+def test_hits_count_rows_already_cached(tmp_path, capsys):
+    cache = FeatureCache(root=str(tmp_path))
+    cache.features(["a.com"])
+    capsys.readouterr()
+
+    # Duplicated misses are extracted once and are not hits
+    cache.features(["a.com", "b.com", "b.com", "c.com", "a.com"])
+    assert "2 of 5 rows hit, 2 domains extracted" in capsys.readouterr().out
@@ -0,0 +1,55 @@
+import pytest
+
+from history_store import HistoryStore
+
+
+def _result(domain, risk, score=50):
+    return {"domain": domain, "risk_level": risk, "threat_score": score, "probability": score / 100}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+
+def test_triggers_keep_risk_counts(store):
+    store.add_many([_result("a.com", "HIGH"), _result("b.com", "LOW"), _result("c.com", "HIGH")])
+    store.add(_result("d.com", "MEDIUM"), url="http://d.com/x")
+
+    assert store.counts() == {"HIGH": 2, "MEDIUM": 1, "LOW": 1, "TOTAL": 4}
+    assert store.count(risk="HIGH") == 2
+
+    with store._conn:
+        store._conn.execute("DELETE FROM scans WHERE domain = 'a.com'")
+    assert store.counts() == {"HIGH": 1, "MEDIUM": 1, "LOW": 1, "TOTAL": 3}
+
+    store.clear()
+    assert store.counts() == {"HIGH": 0, "MEDIUM": 0, "LOW": 0, "TOTAL": 0}
+
+
+def test_pages_are_newest_first_and_filtered(store):
+    for i in range(7):
+        store.add_many([_result(f"d{i}.com", "HIGH" if i % 2 else "LOW", score=i)], ts=1000 + i)
+    store.add_many([_result("d3.com", "LOW")], ts=2000)
+
+    assert [r["domain"] for r in store.page(0, 3)] == ["d3.com", "d6.com", "d5.com"]
+    assert [r["domain"] for r in store.page(2, 3)] == ["d1.com", "d0.com"]
+    assert [r["domain"] for r in store.page(0, 10, risk="HIGH")] == ["d5.com", "d3.com", "d1.com"]
+
+    assert store.count(domain="d3.com") == 2
+    assert store.count(risk="LOW", domain="d3.com") == 1
+    assert store.page(0, 10, domain="d3.com")[0]["url"] == "d3.com"
+
+
+def test_history_is_shared_between_stores(tmp_path):
+    path = str(tmp_path / "history.db")
+    writer, reader = HistoryStore(path), HistoryStore(path)
+
+    writer.add(_result("a.com", "HIGH"), url="http://a.com")
+
+    assert reader.count() == 1
+    assert reader.page()[0]["url"] == "http://a.com"
+    writer.close()
+    reader.close()
@@ -0,0 +1,99 @@
+import os
+
+import joblib
+import pytest
+from sklearn.base import clone
+
+import feature_cache
+import incremental_update
+from features import FEATURE_COLUMNS
+
+
+@pytest.fixture
+def saved_model(tmp_path, monkeypatch, forest, dataset, feature_frame):
+    """A saved balanced-weight forest in tmp_path, and a feature cache there too."""
+
+    monkeypatch.setattr(feature_cache, "DEFAULT_CACHE_DIR", str(tmp_path / "cache"))
+
+    model = clone(forest).set_params(n_estimators=10, class_weight="balanced").fit(
+        feature_frame, dataset["label"]
+    )
+    path = tmp_path / "final_rf_model.pkl"
+    joblib.dump({"model": model, "feature_columns": FEATURE_COLUMNS, "threshold": 0.5}, path)
+    return path
+
+
+@pytest.fixture
+def batches(tmp_path, dataset):
+    """CSV paths of a one-class feed batch, a baseline and a one-row batch."""
+
+    malicious = dataset[dataset["label"] == 1]
+    paths = {
+        "feed": tmp_path / "feed.csv",
+        "baseline": tmp_path / "baseline.csv",
+        "tiny": tmp_path / "tiny.csv",
+    }
+    malicious.iloc[:200].to_csv(paths["feed"], index=False)
+    dataset.iloc[:1000].to_csv(paths["baseline"], index=False)
+    malicious.iloc[:1].to_csv(paths["tiny"], index=False)
+    return paths
+
+
+def _artifacts(tmp_path):
+    return sorted(p for p in os.listdir(tmp_path) if p.startswith("final_rf_") and p != "final_rf_model.pkl")
+
+
+def test_baseline_default_does_not_depend_on_the_working_directory(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    args = incremental_update.parse_args(["batch.csv"])
+    assert os.path.isabs(args.baseline)
+    assert os.path.isfile(args.baseline)
+
+
+def test_one_class_batch_without_replay_exits_before_writing(tmp_path, saved_model, batches):
+    with pytest.raises(SystemExit, match="no label \\[0\\]"):
+        incremental_update.main([
+            str(batches["feed"]), "--model", str(saved_model), "--replay", "0", "--add-trees", "2",
+        ])
+    assert _artifacts(tmp_path) == []
+
+
+def test_too_few_rows_exits_before_writing(tmp_path, saved_model, batches):
+    with pytest.raises(SystemExit, match="too few"):
+        incremental_update.main([
+            str(batches["tiny"]), "--model", str(saved_model), "--replay", "0", "--add-trees", "2",
+        ])
+    assert _artifacts(tmp_path) == []
+
+
+def test_one_class_batch_with_replay_writes_a_version(tmp_path, saved_model, batches):
+    incremental_update.main([
+        str(batches["feed"]), "--model", str(saved_model),
+        "--baseline", str(batches["baseline"]), "--replay", "400", "--add-trees", "3",
+    ])
+
+    pickles = [p for p in _artifacts(tmp_path) if p.endswith(".pkl")]
+    engines = [p for p in _artifacts(tmp_path) if p.startswith("final_rf_engine.")]
+    assert len(pickles) == len(engines) == 1
+
+    saved = joblib.load(tmp_path / pickles[0])
+    assert len(saved["model"].estimator_.estimators_) == 13
+    assert saved["model"].estimator_.class_weight == "balanced"
+
+
+def test_update_forest_grows_and_drops_the_oldest_trees(forest, dataset, feature_frame):
+    y = dataset["label"]
+    model = clone(forest).set_params(n_estimators=5, class_weight="balanced").fit(feature_frame, y)
+    oldest = model.estimators_[:2]
+
+    incremental_update.update_forest(model, feature_frame, y, add_trees=3)
+    assert len(model.estimators_) == model.n_estimators == 8
+    assert model.class_weight == "balanced" and not model.warm_start
+
+    incremental_update.update_forest(model, feature_frame, y, add_trees=1, drop_oldest=2)
+    assert len(model.estimators_) == model.n_estimators == 7
+    assert not any(tree is old for tree in model.estimators_ for old in oldest)
+
+    with pytest.raises(ValueError, match="no rows of class"):
+        incremental_update.update_forest(model, feature_frame[y == 1], y[y == 1], add_trees=1)
+    assert len(model.estimators_) == 7
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from metrics import MetricsRegistry
+
+
+@pytest.fixture
+def registry():
+    """A registry with a counter and a histogram, returned alongside them."""
+
+    registry = MetricsRegistry()
+    urls = registry.counter("urls_total", "URLs scored", ("path",))
+    stages = registry.histogram("stage_seconds", "Stage time", ("stage",), buckets=(0.001, 0.01, 0.1))
+    return registry, urls, stages
+
+
+def test_counter_and_histogram_series(registry):
+    _, urls, stages = registry
+
+    urls.inc("model")
+    urls.inc("model", n=4)
+    urls.inc("cache")
+    for value in [0.0005] * 50 + [0.005] * 40 + [0.05] * 9 + [5.0]:
+        stages.observe(value, "predict")
+
+    assert urls.value("model") == 5
+    assert urls.value("missing") == 0
+
+    series = stages.series()[0]
+    assert series["labels"] == {"stage": "predict"}
+    assert series["count"] == 100
+    assert series["sum"] == pytest.approx(0.025 + 0.2 + 0.45 + 5.0)
+    assert series["p50"] == pytest.approx(0.001)
+    assert series["p90"] == pytest.approx(0.01)
+    assert series["p99"] == pytest.approx(0.1)
+
+    # Beyond the last bucket the estimate is capped at its bound
+    stages.observe(5.0, "slow")
+    assert stages.series()[1]["p50"] == 0.1
+
+
+def test_prometheus_text(registry):
+    registry, urls, stages = registry
+    urls.inc("model", n=3)
+    stages.observe(0.005, "predict")
+    stages.observe(0.5, "predict")
+
+    text = registry.prometheus()
+
+    assert "# TYPE urls_total counter" in text
+    assert 'urls_total{path="model"} 3' in text
+    assert 'stage_seconds_bucket{stage="predict",le="0.01"} 1' in text
+    assert 'stage_seconds_bucket{stage="predict",le="+Inf"} 2' in text
+    assert 'stage_seconds_count{stage="predict"} 2' in text
+
+
+def test_timer_laps_and_disabled_registry():
+    registry = MetricsRegistry()
+    stages = registry.histogram("stage_seconds", "Stage time", ("mode", "stage"))
+    total = registry.histogram("total_seconds", "Call time", ("mode",))
+
+    timer = registry.timer(stages, total, "single")
+    timer.lap("features")
+    timer.lap("predict")
+    timer.finish()
+
+    assert [s["labels"]["stage"] for s in stages.series()] == ["features", "predict"]
+    assert total.series()[0]["count"] == 1
+
+    registry.enabled = False
+    registry.timer(stages, total, "single").finish()
+    assert total.series()[0]["count"] == 1
+
+    with pytest.raises(ValueError):
+        registry.counter("total_seconds", "duplicate")
+
+
+def test_reset_and_snapshot_file(registry, tmp_path):
+    registry, urls, _ = registry
+    urls.inc("model")
+    path = tmp_path / "metrics.json"
+
+    registry.write_snapshot(str(path))
+    snapshot = json.loads(path.read_text())
+    assert snapshot["metrics"]["urls_total"]["series"] == [{"labels": {"path": "model"}, "value": 1}]
+
+    registry.reset()
+    assert registry.snapshot()["metrics"]["urls_total"]["series"] == []
+
+    registry.write_snapshot(str(tmp_path / "metrics.prom"))
+    assert (tmp_path / "metrics.prom").read_text().startswith("# HELP urls_total")
@@ -0,0 +1,38 @@
+import pytest
+
+from model_loader import ENGINE_MODEL_PATH, PICKLE_MODEL_PATH, ModelLoader, batch_model_path, default_model_path
+
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    monkeypatch.delenv("THREAT_MODEL_PATH", raising=False)
+    monkeypatch.delenv("THREAT_MODEL_FORMAT", raising=False)
+
+
+def test_engine_serves_and_pickle_scores_large_batches_by_default():
+    assert default_model_path() == ENGINE_MODEL_PATH
+    assert batch_model_path() == PICKLE_MODEL_PATH
+
+
+def test_pickle_format_serves_everything(monkeypatch):
+    monkeypatch.setenv("THREAT_MODEL_FORMAT", "pickle")
+    assert default_model_path() == batch_model_path() == PICKLE_MODEL_PATH
+
+
+def test_model_path_overrides_both(monkeypatch):
+    monkeypatch.setenv("THREAT_MODEL_PATH", ENGINE_MODEL_PATH)
+    monkeypatch.setenv("THREAT_MODEL_FORMAT", "pickle")
+    assert default_model_path() == batch_model_path() == ENGINE_MODEL_PATH
+
+
+def test_unknown_format_is_rejected(monkeypatch):
+    monkeypatch.setenv("THREAT_MODEL_FORMAT", "npz")
+    with pytest.raises(ValueError):
+        default_model_path()
+
+
+def test_missing_artifact_names_the_path(tmp_path):
+    loader = ModelLoader(str(tmp_path / "missing"))
+    with pytest.raises(FileNotFoundError, match="missing"):
+        loader.load()
+    assert not loader.loaded
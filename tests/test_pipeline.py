@@ -0,0 +1,21 @@
+import pipeline
+
+
+def test_train_stage_depends_on_every_module_train_model_imports():
+    train = next(s for s in pipeline.default_stages() if s.name == "train")
+
+    for module in ["resources", "model_loader", "model_search", "calibration", "feature_cache",
+                   "forest_engine", "features", "keyword_matcher"]:
+        assert f"src/{module}.py" in train.inputs
+    assert "src/threat_engine.py" not in train.inputs
+
+
+def test_local_imports_follows_function_level_imports(tmp_path, monkeypatch):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.py").write_text("import os\nfrom b import x\n")
+    (tmp_path / "src" / "b.py").write_text("def f():\n    import c.sub\n")
+    (tmp_path / "src" / "c.py").write_text("import a\n")
+    monkeypatch.setattr(pipeline, "REPO_ROOT", str(tmp_path))
+
+    assert pipeline.local_imports("src/a.py") == ["src/b.py", "src/c.py"]
+    assert pipeline.local_imports("src/missing.py") == []
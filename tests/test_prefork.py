@@ -0,0 +1,39 @@
+import warnings
+
+import joblib
+import pytest
+from sklearn.base import clone
+
+import threat_engine
+from bulk_scan import score_chunk
+from features import FEATURE_COLUMNS
+from model_loader import ModelLoader
+from prefork import PreforkPool
+
+
+@pytest.fixture
+def parallel_forest_engine(tmp_path, monkeypatch, forest, dataset, feature_frame):
+    """threat_engine scoring with a forest fitted for n_jobs=2, as trained models are."""
+
+    model = clone(forest).set_params(n_jobs=2).fit(feature_frame, dataset["label"])
+    path = tmp_path / "model.pkl"
+    joblib.dump({"model": model, "feature_columns": FEATURE_COLUMNS, "threshold": 0.5}, path)
+
+    loader = ModelLoader(str(path))
+    monkeypatch.setattr(threat_engine, "loader", loader)
+    monkeypatch.setattr(threat_engine, "batch_loader", loader)
+    return threat_engine
+
+
+def test_prefork_workers_score_without_warnings(parallel_forest_engine, domains):
+    chunks = [domains[:200], domains[200:400]]
+
+    # Forked workers inherit the filter, so a warning comes back as the
+    # chunk's exception and is raised here
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        with PreforkPool(2) as pool:
+            scored = list(pool.imap(iter(chunks)))
+
+    assert scored == [score_chunk(chunk) for chunk in chunks]
+    assert parallel_forest_engine.loader.model.n_jobs == 2
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+from sklearn.calibration import CalibratedClassifierCV
+
+import forest_engine
+from features import FEATURE_COLUMNS, extract_features, extract_features_batch, extract_features_parallel
+from forest_engine import ForestEngine
+from threat_engine import normalize_url
+
+
+# ================================
+# Batch vs Single-URL Scoring
+# ================================
+
+ODD_URLS = [
+    "",
+    "   ",
+    "https://www.google.com/search?q=x",
+    "http://user@paypal-login.xyz:8080/verify",
+    "HTTP://EXAMPLE.COM",
+    "http://[bad",
+    "192.168.10.4/admin",
+    "xn--pypal-4ve.com",
+    "müller-shop.de/login",
+    "http://<img src=x onerror=alert(1)>.com/path",
+]
+
+
+def test_analyze_urls_matches_analyze_url(engine_with_model, domains):
+    urls = ODD_URLS + domains[:300]
+
+    batch = engine_with_model.analyze_urls(urls)
+    single = [engine_with_model.analyze_url(u) for u in urls]
+
+    assert batch == single
+    assert not engine_with_model.batch_loader.loaded
+
+
+def test_large_batches_use_the_batch_model(engine_with_model, monkeypatch, domains):
+    monkeypatch.setattr(engine_with_model, "BATCH_MODEL_ROWS", 200)
+    urls = domains[:300]
+
+    batch = engine_with_model.analyze_urls(urls)
+    single = [engine_with_model.analyze_url(u) for u in urls]
+
+    assert engine_with_model.batch_loader.loaded
+    assert isinstance(engine_with_model.loader.model, ForestEngine)
+    assert [r["prediction"] for r in batch] == [r["prediction"] for r in single]
+    np.testing.assert_allclose([r["probability"] for r in batch], [r["probability"] for r in single], atol=1e-4)
+
+
+@pytest.mark.parametrize("url", [
+    "http://<img src=x onerror=alert(1)>.com/path",
+    'http://a"b.com',
+    "http://a b.com",
+    "http://a%41.com",
+])
+def test_normalize_url_rejects_non_hostname_characters(url):
+    assert normalize_url(url)[1] == ""
+
+
+def test_normalize_url_keeps_valid_hosts():
+    assert normalize_url("https://www.Sub_1.example-shop.com/x")[1] == "sub_1.example-shop.com"
+    assert normalize_url("münchen.de")[1] == "münchen.de"
+    assert normalize_url("http://[::1]:8080/")[1] == "::1"
+
+
+# ================================
+# ForestEngine vs sklearn
+# ================================
+
+
+@pytest.mark.parametrize("method", [None, "sigmoid", "isotonic"])
+@pytest.mark.parametrize("block_pairs", [forest_engine.BLOCK_PAIRS, 100])
+def test_engine_matches_sklearn(monkeypatch, forest, dataset, feature_frame, method, block_pairs):
+    model = forest
+    if method:
+        model = CalibratedClassifierCV(forest, method=method, cv=2).fit(feature_frame, dataset["label"])
+
+    # Small blocks split the batch across many traversal blocks
+    monkeypatch.setattr(forest_engine, "BLOCK_PAIRS", block_pairs)
+    engine = ForestEngine.from_model(model)
+
+    expected = model.predict_proba(feature_frame)
+    actual = engine.predict_proba(feature_frame.to_numpy())
+
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-12)
+    assert engine.predict_proba(feature_frame.to_numpy()[:0]).shape == (0, 2)
+
+
+# ================================
+# Feature Extraction
+# ================================
+
+EDGE_DOMAINS = ["", "a", "192.168.0.1", "paypal.com", "secure-paypal-login.xyz", "münchen.de",
+                "xn--80ak6aa92e.com", "a.b.c.d.e.f.top", "1234567890.info", "UPPER.COM"]
+
+
+def test_batch_features_match_scalar(domains):
+    sample = EDGE_DOMAINS + domains[:500]
+
+    batch = extract_features_batch(sample, dtype=np.float64)
+    scalar = np.array([[extract_features(d)[c] for c in FEATURE_COLUMNS] for d in sample], dtype=np.float64)
+
+    np.testing.assert_array_equal(batch, scalar)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_parallel_features_bit_identical(domains, dtype):
+    # min_chunk is lowered so the input really is split across 4 chunks
+    serial = extract_features_batch(domains, dtype=dtype)
+    parallel = extract_features_parallel(domains, dtype=dtype, n_jobs=2, min_chunk=300)
+
+    assert parallel.dtype == serial.dtype
+    assert parallel.tobytes() == serial.tobytes()
@@ -0,0 +1,125 @@
+import asyncio
+import json
+
+import pytest
+import tornado.testing
+
+import threat_engine
+from scoring_service import MicroBatcher, make_app
+
+
+def _json(value):
+    """value as it comes back from a JSON response."""
+    return json.loads(json.dumps(value))
+
+
+@pytest.mark.usefixtures("engine_with_model")
+class ScoringServiceTest(tornado.testing.AsyncHTTPTestCase):
+
+    def get_app(self):
+        self.batcher = MicroBatcher(max_batch=4, max_wait_ms=2.0)
+        return make_app(self.batcher)
+
+    def tearDown(self):
+        super().tearDown()
+        self.batcher.executor.shutdown()
+
+    def post(self, path, body):
+        data = body if isinstance(body, (str, bytes)) else json.dumps(body)
+        return self.fetch(path, method="POST", body=data, raise_error=False)
+
+    def test_score_get_and_post(self):
+        expected = _json(threat_engine.analyze_url("paypal-login.xyz/verify"))
+
+        response = self.fetch("/score?url=paypal-login.xyz/verify")
+        self.assertEqual(response.code, 200)
+        self.assertEqual(json.loads(response.body), expected)
+
+        response = self.post("/score", {"url": "paypal-login.xyz/verify"})
+        self.assertEqual(response.code, 200)
+        self.assertEqual(json.loads(response.body), expected)
+
+    def test_score_batch(self):
+        urls = ["google.com", "paypal-login.xyz", "", "192.168.0.1/admin", "http://[bad", "a.io"]
+
+        response = self.post("/score/batch", {"urls": urls})
+        self.assertEqual(response.code, 200)
+        self.assertEqual(json.loads(response.body), {"results": _json(threat_engine.analyze_urls(urls))})
+
+        response = self.post("/score/batch", {"urls": []})
+        self.assertEqual(json.loads(response.body), {"results": []})
+
+    def test_bad_bodies(self):
+        cases = [
+            ("/score", b"not json"),
+            ("/score", "[1, 2]"),
+            ("/score", '"x"'),
+            ("/score", "3"),
+            ("/score", {"url": 3}),
+            ("/score", {}),
+            ("/score/batch", "[1, 2]"),
+            ("/score/batch", "null"),
+            ("/score/batch", {"urls": "a.com"}),
+            ("/score/batch", {"urls": ["a.com", 3]}),
+        ]
+        for path, body in cases:
+            response = self.post(path, body)
+            self.assertEqual(response.code, 400, (path, body))
+            self.assertIn("error", json.loads(response.body))
+
+        self.assertEqual(self.fetch("/score", raise_error=False).code, 400)
+        self.assertEqual(self.batcher.urls_scored, 0)
+
+    @tornado.testing.gen_test(timeout=10)
+    async def test_concurrent_requests_share_a_batch(self):
+        # max_batch is 4 and the wait a minute, so the four requests are
+        # only answered in time if they are flushed together
+        self.batcher.max_wait = 60.0
+        urls = [f"host{i}.example.com" for i in range(4)]
+
+        responses = await asyncio.gather(*[
+            self.http_client.fetch(self.get_url("/score"), method="POST", body=json.dumps({"url": url}))
+            for url in urls
+        ])
+
+        self.assertEqual([json.loads(r.body)["domain"] for r in responses], urls)
+        self.assertEqual(self.batcher.stats()["batches"], 1)
+        self.assertEqual(self.batcher.urls_scored, 4)
+
+
+class MicroBatcherTest(tornado.testing.AsyncTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.batches = []
+        self.batcher = MicroBatcher(max_batch=3, max_wait_ms=60_000)
+        self.batcher._score_sync = self._score
+
+    def tearDown(self):
+        self.batcher.executor.shutdown()
+        super().tearDown()
+
+    def _score(self, urls):
+        self.batches.append(urls)
+        return [url.upper() for url in urls]
+
+    @tornado.testing.gen_test(timeout=5)
+    async def test_flushes_when_max_batch_is_reached(self):
+        # The wait is a minute, so only the size limit can flush in time
+        results = await asyncio.gather(
+            self.batcher.score(["a"]), self.batcher.score(["b", "c"]),
+            self.batcher.score(["d", "e", "f", "g"]),
+        )
+
+        self.assertEqual(results, [["A"], ["B", "C"], ["D", "E", "F", "G"]])
+        self.assertEqual(self.batches, [["a", "b", "c"], ["d", "e", "f", "g"]])
+
+    @tornado.testing.gen_test(timeout=5)
+    async def test_flushes_after_max_wait(self):
+        self.batcher.max_wait = 0.01
+
+        results = await asyncio.gather(self.batcher.score(["a"]), self.batcher.score(["b"]))
+
+        self.assertEqual(results, [["A"], ["B"]])
+        self.assertEqual(self.batches, [["a", "b"]])
+        self.assertEqual(self.batcher.stats()["avg_batch_size"], 2.0)
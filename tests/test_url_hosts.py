@@ -0,0 +1,30 @@
+import random
+
+import pandas as pd
+
+from url_hosts import extract_hosts, url_host
+
+
+def _random_urls(n, seed=0):
+    rng = random.Random(seed)
+    schemes = ["", "http://", "https://", "HTTP://", "ftp://", " https://"]
+    hosts = ["example.com", "www.paypal-login.xyz", "münchen.de", "xn--80ak6aa92e.com",
+             "192.168.0.1", "[::1]", "[bad", "пример.рф", "例え.jp", "user:pw@host.io",
+             "<img src=x>.com", 'a"b.com', "a%41.com", "a_b.io"]
+    tails = ["", "/", ":8080", ":8080/path", "/a?b=c#d", "?q=ü", "\t", "/\n", "#frag", "/日本"]
+    return [
+        rng.choice(schemes) + rng.choice(["", "www."]) + rng.choice(hosts) + rng.choice(tails)
+        for _ in range(n)
+    ]
+
+
+def test_extract_hosts_matches_url_host():
+    urls = _random_urls(5000) + ["", "   ", "http://", "ÄÖÜ", "a.com"]
+
+    expected = [url_host(u) for u in urls]
+    assert extract_hosts(pd.Series(urls)).tolist() == expected
+
+
+def test_extract_hosts_missing_values():
+    hosts = extract_hosts(pd.Series(["http://a.com", None, float("nan"), "b.org"], dtype=object))
+    assert hosts.tolist() == ["a.com", "", "", "b.org"]
@@ -0,0 +1,71 @@
+import time
+
+from verdict_cache import VerdictCache, cache_key
+
+RESULT = {"domain": "a.com", "probability": 0.9, "risk_level": "HIGH", "reasons": ["x"]}
+
+
+def test_cache_key_keeps_only_what_heuristics_read():
+    assert cache_key("http://a.com/x", "a.com") == cache_key("http://a.com/y", "a.com")
+    assert cache_key("https://a.com", "a.com") != cache_key("http://a.com", "a.com")
+    assert cache_key("http://u@a.com", "a.com") != cache_key("http://a.com", "a.com")
+    assert cache_key("http://a.com/" + "x" * 80, "a.com") != cache_key("http://a.com", "a.com")
+
+
+def test_results_are_copied_in_and_out():
+    cache = VerdictCache(maxsize=10)
+    result = dict(RESULT, reasons=["x"])
+    cache.put("k", "v1", result)
+    result["reasons"].append("mutated")
+
+    got = cache.get("k", "v1")
+    got["reasons"].append("mutated again")
+
+    assert cache.get("k", "v1")["reasons"] == ["x"]
+
+
+def test_new_model_version_invalidates():
+    cache = VerdictCache(maxsize=10)
+    cache.put("k", "v1", RESULT)
+
+    assert cache.get("k", "v1") == RESULT
+    assert cache.get("k", "v2") is None
+    cache.put("k", "v2", RESULT)
+    assert cache.get("k", "v1") is None
+
+    stats = cache.stats()
+    assert stats["invalidations"] == 2
+    assert stats["model_version"] == "v1"
+    assert stats["evictions"] == 0
+
+
+def test_entries_expire_after_ttl():
+    cache = VerdictCache(maxsize=10, ttl=0.05)
+    cache.put("k", "v1", RESULT)
+    assert cache.get("k", "v1") == RESULT
+
+    time.sleep(0.1)
+
+    assert cache.get("k", "v1") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_lru_evicts_least_recently_used():
+    cache = VerdictCache(maxsize=2)
+    cache.put("a", "v1", RESULT)
+    cache.put("b", "v1", RESULT)
+    cache.get("a", "v1")
+    cache.put("c", "v1", RESULT)
+
+    assert cache.get("b", "v1") is None
+    assert cache.get("a", "v1") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_maxsize_zero_disables():
+    cache = VerdictCache(maxsize=0)
+    cache.put("k", "v1", RESULT)
+
+    assert not cache.enabled
+    assert cache.get("k", "v1") is None
+    assert cache.stats()["size"] == 0